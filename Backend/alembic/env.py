@@ -9,6 +9,8 @@ from app.models.people_data import PeopleData
 from app.models.summary import SummaryNotes
 from app.models.company_pdfs import CompanyPDFs
 from app.models.company_charges import CompanyCharges
+from app.models.upload_job import UploadJob
+from app.models.company_listing import CompanyListing
 from app.db.base import Base  # SQLAlchemy Base
 from app.core.config import DATABASE_URL 
 
@@ -0,0 +1,35 @@
+"""Add ngram FULLTEXT index on company_listing.company_name
+
+Revision ID: 0c6e94a1b7d3
+Revises: f3b8d2e61c07
+Create Date: 2026-10-18 15:47:12.602931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c6e94a1b7d3'
+down_revision: Union[str, Sequence[str], None] = 'f3b8d2e61c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The ngram parser indexes every ngram_token_size-character substring, so
+    # the search box keeps matching inside names. Run the server with
+    # innodb_ft_enable_stopword=OFF: with the default stopword list, n-grams
+    # containing a stopword such as "a" are left out of the index.
+    op.create_index(
+        'ix_company_listing_name_fulltext', 'company_listing', ['company_name'], unique=False,
+        mysql_prefix='FULLTEXT', mysql_with_parser='ngram',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_company_listing_name_fulltext', table_name='company_listing')
@@ -0,0 +1,28 @@
+"""Add refreshed_at index on company_listing
+
+Revision ID: 7a1d5e8c3f20
+Revises: 0c6e94a1b7d3
+Create Date: 2026-10-18 16:20:37.115804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a1d5e8c3f20'
+down_revision: Union[str, Sequence[str], None] = '0c6e94a1b7d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_company_listing_refreshed_at', 'company_listing', ['refreshed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_company_listing_refreshed_at', table_name='company_listing')
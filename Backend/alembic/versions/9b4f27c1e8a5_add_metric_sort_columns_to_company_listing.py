@@ -0,0 +1,37 @@
+"""Add surplus_latest and metric sort indexes to company_listing
+
+Revision ID: 9b4f27c1e8a5
+Revises: 7a1d5e8c3f20
+Create Date: 2026-10-18 17:05:51.930448
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4f27c1e8a5'
+down_revision: Union[str, Sequence[str], None] = '7a1d5e8c3f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # surplus_latest is filled in by the listing rebuild that runs on startup
+    op.add_column('company_listing', sa.Column('surplus_latest', sa.Float(), nullable=True))
+    op.create_index('ix_company_listing_status_turnover_id', 'company_listing', ['company_status', 'turnover_latest', 'company_id'], unique=False)
+    op.create_index('ix_company_listing_status_fair_value_id', 'company_listing', ['company_status', 'assets_fair_value_latest', 'company_id'], unique=False)
+    op.create_index('ix_company_listing_status_surplus_id', 'company_listing', ['company_status', 'surplus_latest', 'company_id'], unique=False)
+    op.create_index('ix_company_listing_status_modified_id', 'company_listing', ['company_status', 'last_modified', 'company_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_company_listing_status_modified_id', table_name='company_listing')
+    op.drop_index('ix_company_listing_status_surplus_id', table_name='company_listing')
+    op.drop_index('ix_company_listing_status_fair_value_id', table_name='company_listing')
+    op.drop_index('ix_company_listing_status_turnover_id', table_name='company_listing')
+    op.drop_column('company_listing', 'surplus_latest')
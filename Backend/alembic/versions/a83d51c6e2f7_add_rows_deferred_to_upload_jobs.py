@@ -0,0 +1,28 @@
+"""Add rows_deferred to upload_jobs
+
+Revision ID: a83d51c6e2f7
+Revises: 5e0c2a7f9b14
+Create Date: 2026-10-18 11:27:40.902315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83d51c6e2f7'
+down_revision: Union[str, Sequence[str], None] = '5e0c2a7f9b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('upload_jobs', sa.Column('rows_deferred', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('upload_jobs', 'rows_deferred')
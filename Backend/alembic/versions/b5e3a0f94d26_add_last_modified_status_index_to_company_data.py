@@ -0,0 +1,28 @@
+"""Add (last_modified, status, approval_stage) index to company_data for POST /company-status
+
+Revision ID: b5e3a0f94d26
+Revises: 9b4f27c1e8a5
+Create Date: 2026-10-18 18:12:26.481937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e3a0f94d26'
+down_revision: Union[str, Sequence[str], None] = '9b4f27c1e8a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_company_data_last_modified_status_approval', 'company_data', ['last_modified', 'status', 'approval_stage'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_company_data_last_modified_status_approval', table_name='company_data')
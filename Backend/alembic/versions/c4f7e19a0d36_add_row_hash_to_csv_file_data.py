@@ -0,0 +1,63 @@
+"""Add row_hash to csv_file_data and rows_duplicate to upload_jobs
+
+Revision ID: c4f7e19a0d36
+Revises: a83d51c6e2f7
+Create Date: 2026-10-18 12:40:03.215876
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f7e19a0d36'
+down_revision: Union[str, Sequence[str], None] = 'a83d51c6e2f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _content_hash(company_name, full_address):
+    # Same normalization as app.utils.upload_jobs.content_hash at the time of this migration
+    normalized = " ".join(company_name.lower().split()) + "|" + " ".join(full_address.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('csv_file_data', sa.Column('row_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_csv_file_data_row_hash'), 'csv_file_data', ['row_hash'], unique=False)
+    op.add_column('upload_jobs', sa.Column('rows_duplicate', sa.Integer(), nullable=True))
+
+    # Backfill hashes for rows recorded before this column existed
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(sa.text(
+            "SELECT id, company_name, address1, address2, address3, city, county "
+            "FROM csv_file_data WHERE id > :last_id ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for row in rows:
+            if row.company_name:
+                full_address = ", ".join(
+                    part for part in [row.address1, row.address2, row.address3, row.city, row.county] if part
+                )
+                updates.append({"id": row.id, "row_hash": _content_hash(row.company_name, full_address)})
+        if updates:
+            conn.execute(sa.text("UPDATE csv_file_data SET row_hash = :row_hash WHERE id = :id"), updates)
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('upload_jobs', 'rows_duplicate')
+    op.drop_index(op.f('ix_csv_file_data_row_hash'), table_name='csv_file_data')
+    op.drop_column('csv_file_data', 'row_hash')
@@ -0,0 +1,41 @@
+"""Add indexed normalized company name to company_data and csv_file_data
+
+Revision ID: d81b6f3c5a92
+Revises: c4f7e19a0d36
+Create Date: 2026-10-18 13:52:47.630118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81b6f3c5a92'
+down_revision: Union[str, Sequence[str], None] = 'c4f7e19a0d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same expression as app.utils.company_names.NORMALIZED_NAME_SQL at the time of this migration.
+# As a STORED generated column MySQL computes it for every existing row when the
+# column is added, which backfills both tables.
+NORMALIZED_NAME_SQL = "LOWER(TRIM(REPLACE(REPLACE(company_name, 'Ltd.', 'Limited'), 'Ltd', 'Limited')))"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('company_data', 'csv_file_data'):
+        op.add_column(table, sa.Column(
+            'company_name_normalized',
+            sa.String(length=255),
+            sa.Computed(NORMALIZED_NAME_SQL, persisted=True),
+        ))
+        op.create_index(op.f(f'ix_{table}_company_name_normalized'), table, ['company_name_normalized'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('csv_file_data', 'company_data'):
+        op.drop_index(op.f(f'ix_{table}_company_name_normalized'), table_name=table)
+        op.drop_column(table, 'company_name_normalized')
@@ -0,0 +1,36 @@
+"""Add company_listing_version, the listing ETag watermark
+
+Revision ID: d8c61f3a5e07
+Revises: b5e3a0f94d26
+Create Date: 2026-10-18 20:31:05.204417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8c61f3a5e07'
+down_revision: Union[str, Sequence[str], None] = 'b5e3a0f94d26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('company_listing_version',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO company_listing_version (id, version) VALUES (1, 1)")
+    # MAX(refreshed_at) is no longer read
+    op.drop_index('ix_company_listing_refreshed_at', table_name='company_listing')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_company_listing_refreshed_at', 'company_listing', ['refreshed_at'], unique=False)
+    op.drop_table('company_listing_version')
@@ -0,0 +1,28 @@
+"""Add (company_name, id) index to company_data for keyset pagination
+
+Revision ID: e2a9c07d4b18
+Revises: d81b6f3c5a92
+Create Date: 2026-10-18 14:31:09.774520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a9c07d4b18'
+down_revision: Union[str, Sequence[str], None] = 'd81b6f3c5a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_company_data_company_name_id', 'company_data', ['company_name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_company_data_company_name_id', table_name='company_data')
@@ -0,0 +1,79 @@
+"""Lowercase company names before spelling out Ltd in company_name_normalized
+
+Revision ID: e41a7c2d9f63
+Revises: d8c61f3a5e07
+Create Date: 2026-10-18 21:04:52.318640
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a7c2d9f63'
+down_revision: Union[str, Sequence[str], None] = 'd8c61f3a5e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+# app.utils.company_names.NORMALIZED_NAME_SQL before and after this migration
+OLD_NORMALIZED_NAME_SQL = "LOWER(TRIM(REPLACE(REPLACE(company_name, 'Ltd.', 'Limited'), 'Ltd', 'Limited')))"
+NORMALIZED_NAME_SQL = "TRIM(REPLACE(REPLACE(LOWER(company_name), 'ltd.', 'limited'), 'ltd', 'limited'))"
+
+
+def _normalize_company_name(name):
+    # Same as app.utils.company_names.normalize_company_name at the time of this migration
+    return name.lower().replace("ltd.", "limited").replace("ltd", "limited").strip(" ")
+
+
+def _content_hash(company_name, full_address):
+    # Same as app.utils.upload_jobs.content_hash at the time of this migration
+    normalized = " ".join(_normalize_company_name(company_name).split()) + "|" + " ".join(full_address.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _set_expression(expression):
+    # MySQL recomputes the STORED column (and its index) for every row
+    for table in ('company_data', 'csv_file_data'):
+        op.execute(
+            f"ALTER TABLE {table} MODIFY company_name_normalized VARCHAR(255) "
+            f"GENERATED ALWAYS AS ({expression}) STORED"
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _set_expression(NORMALIZED_NAME_SQL)
+
+    # row_hash is built from the normalized name, so recompute it to keep
+    # recorded rows recognisable as duplicates
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(sa.text(
+            "SELECT id, company_name, address1, address2, address3, city, county "
+            "FROM csv_file_data WHERE id > :last_id ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for row in rows:
+            if row.company_name:
+                full_address = ", ".join(
+                    part for part in [row.address1, row.address2, row.address3, row.city, row.county] if part
+                )
+                updates.append({"id": row.id, "row_hash": _content_hash(row.company_name, full_address)})
+        if updates:
+            conn.execute(sa.text("UPDATE csv_file_data SET row_hash = :row_hash WHERE id = :id"), updates)
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # row_hash values are left as they are
+    _set_expression(OLD_NORMALIZED_NAME_SQL)
@@ -0,0 +1,55 @@
+"""Add company_listing read model
+
+Revision ID: f3b8d2e61c07
+Revises: e2a9c07d4b18
+Create Date: 2026-10-18 15:02:44.318206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d2e61c07'
+down_revision: Union[str, Sequence[str], None] = 'e2a9c07d4b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The table starts empty; the app fills it with a full rebuild on startup
+    op.create_table('company_listing',
+    sa.Column('company_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('company_name', sa.String(length=255), nullable=False),
+    sa.Column('key_financial_data_id', sa.Integer(), nullable=True),
+    sa.Column('company_status', sa.String(length=50), nullable=True),
+    sa.Column('registration_number', sa.String(length=50), nullable=True),
+    sa.Column('approval_stage', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('type_of_scheme', sa.String(length=100), nullable=True),
+    sa.Column('last_modified', sa.DateTime(), nullable=True),
+    sa.Column('people_page_link', sa.String(length=255), nullable=True),
+    sa.Column('turnover_latest', sa.Float(), nullable=True),
+    sa.Column('assets_fair_value_latest', sa.Float(), nullable=True),
+    sa.Column('pdf_count', sa.Integer(), nullable=True),
+    sa.Column('turnover_data', sa.JSON(), nullable=True),
+    sa.Column('fair_value_assets', sa.JSON(), nullable=True),
+    sa.Column('key_financial_data', sa.JSON(), nullable=True),
+    sa.Column('pdf_links', sa.JSON(), nullable=True),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('company_id')
+    )
+    op.create_index('ix_company_listing_name_id', 'company_listing', ['company_name', 'company_id'], unique=False)
+    op.create_index('ix_company_listing_status_name_id', 'company_listing', ['company_status', 'company_name', 'company_id'], unique=False)
+    op.create_index('ix_company_listing_approval_stage', 'company_listing', ['approval_stage'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_company_listing_approval_stage', table_name='company_listing')
+    op.drop_index('ix_company_listing_status_name_id', table_name='company_listing')
+    op.drop_index('ix_company_listing_name_id', table_name='company_listing')
+    op.drop_table('company_listing')
@@ -0,0 +1,28 @@
+"""Add (last_modified, id) index to company_data for the status event poller
+
+Revision ID: f7d2b8e04c19
+Revises: e41a7c2d9f63
+Create Date: 2026-10-18 21:26:14.905731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7d2b8e04c19'
+down_revision: Union[str, Sequence[str], None] = 'e41a7c2d9f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_company_data_last_modified_id', 'company_data', ['last_modified', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_company_data_last_modified_id', table_name='company_data')
@@ -1,23 +1,61 @@
 import os
+import asyncio
+import hmac
 import csv,requests
+import orjson
 from io import StringIO
-from datetime import datetime
+from datetime import datetime, timedelta
 from fastapi import Body
 from fastapi.responses import StreamingResponse
 import pandas as pd
 from io import BytesIO
 from decouple import config 
-from app.core.config import REPROCESS_COMPANY_API,PROCESS_COMPANY_API
-from fastapi import APIRouter, Depends, HTTPException,Request,File, UploadFile,Response
-from fastapi.responses import JSONResponse
+from app.core.config import (
+    UPLOAD_DIR,
+    LISTING_ESTIMATE_COUNT_CAP,
+    LISTING_STREAM_BATCH_SIZE,
+    STATUS_EVENTS_HEARTBEAT,
+    STATUS_EVENTS_TOKEN_TTL,
+    ML_CALLBACK_SECRET,
+    COMPANY_STATUS_MAX_IDS,
+    COMPANY_STATUS_WATERMARK_MARGIN,
+    REPROCESS_BULK_CHUNK_SIZE,
+    REPROCESS_BULK_CONCURRENCY,
+)
+from fastapi import APIRouter, Depends, HTTPException,Request,File, UploadFile,Response,Header
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
-from app.utils.jwt import create_access_token, decode_token, get_current_user
+from app.utils.jwt import (
+    create_access_token,
+    create_stream_token,
+    decode_token,
+    get_current_user,
+    get_current_user_from_query,
+)
 from app.schemas.user import *
+from app.schemas.company import (
+    CompanyListingResponse,
+    PersonItem,
+    CompanyPdfsResponse,
+    CompanyStatusRequest,
+    CompanyStatusResponse,
+)
+from app.schemas.ml import MLCallbackBatch
 from app.crud.user import create_user
 from app.models.user import User
 from app.models.csv_file_data import CSVFileData
 from app.utils.email import send_reset_email
+from app.utils.upload_jobs import submit_upload_job
+from app.utils.dispatch import run_concurrently
+from app.utils import ml_client, ml_callbacks
+from app.utils.company_names import normalize_company_name
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_after
+from app.utils.count_cache import listing_counts
+from app.utils.search import name_search_filter, relevance_order
+from app.utils.etag import weak_etag, etag_matches, set_etag, not_modified
+from app.utils.status_events import broker as status_broker, publish_company_status
 from passlib.context import CryptContext
 from app.models.company import CompanyData 
 from app.models.people_data import PeopleData
@@ -25,8 +63,18 @@ from app.models.summary import SummaryNotes
 from app.models.company_pdfs import CompanyPDFs
 from app.models.company_charges import CompanyCharges
 from app.models.key_financial_data import KeyFinancialData
+from app.models.upload_job import UploadJob
+from app.models.company_listing import CompanyListing
+from app.crud.company_listing import (
+    refresh_company_listing,
+    refresh_company_listing_for_registrations,
+    delete_company_listing,
+    extract_latest,
+    listing_version,
+)
 from typing import List,Optional
 import shutil
+import uuid
 
 router = APIRouter()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -99,240 +147,495 @@ def reset_password(data: ResetPasswordSchema, db: Session = Depends(get_db)):
     return {"msg": "Password updated successfully"}
 
 
-@router.get("/company-data")
-def get_company_data(
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    page: int = 1,
-    per_page: int = 100,
-    search: str = None,
-    sort_by: str = 'asc',
-    show_inactive: bool = False,
-    approval_filter: str = 'all'
-):
-    # Base query
-    base_query = db.query(CompanyData)
-
-    # Sorting
-    if sort_by == 'asc':
-        base_query = base_query.order_by(CompanyData.company_name.asc())
-    elif sort_by == 'desc':
-        base_query = base_query.order_by(CompanyData.company_name.desc())
-
-    # Search filter
+# sort_field / range filter name -> indexed company_listing column
+METRIC_COLUMNS = {
+    "turnover": CompanyListing.turnover_latest,
+    "fair_value": CompanyListing.assets_fair_value_latest,
+    "surplus": CompanyListing.surplus_latest,
+    "last_modified": CompanyListing.last_modified,
+}
+
+
+def _listing_status(row):
+    if row.key_financial_data_id is not None:
+        # Use the existing company_status from database instead of overriding it.
+        # Missing statuses are filled in by the normalization job (app/utils/maintenance.py);
+        # until then show the status it will write
+        return row.company_status or ("Active" if row.registration_number else "Inactive")
+    return "Inactive"
+
+
+# Listing output field -> (company_listing columns it is built from, value for a row).
+# fields= picks a subset, and only those columns are selected
+LISTING_FIELDS = {
+    "id": ((CompanyListing.company_id,), lambda row: row.company_id),
+    "company_name": ((CompanyListing.company_name,), lambda row: row.company_name),
+    "registration_number": ((CompanyListing.registration_number,), lambda row: row.registration_number),
+    "company_status": (
+        (CompanyListing.key_financial_data_id, CompanyListing.company_status, CompanyListing.registration_number),
+        _listing_status,
+    ),
+    "approval_stage": ((CompanyListing.approval_stage,), lambda row: row.approval_stage),
+    "status": ((CompanyListing.status,), lambda row: row.status),
+    "type_of_scheme": ((CompanyListing.type_of_scheme,), lambda row: row.type_of_scheme),
+    "last_modified": ((CompanyListing.last_modified,), lambda row: row.last_modified),
+    # The raw latest values; the float columns are only the sort/filter keys
+    "turnover_latest": ((CompanyListing.turnover_data,), lambda row: extract_latest(row.turnover_data)),
+    "assets_fair_value_latest": (
+        (CompanyListing.fair_value_assets,),
+        lambda row: extract_latest(row.fair_value_assets),
+    ),
+    "turnover_data": ((CompanyListing.turnover_data,), lambda row: row.turnover_data),
+    "fair_value_assets": ((CompanyListing.fair_value_assets,), lambda row: row.fair_value_assets),
+    "people_page_link": (
+        (CompanyListing.people_page_link, CompanyListing.company_id),
+        lambda row: row.people_page_link or f"/people/{row.company_id}",
+    ),
+    "key_financial_data": ((CompanyListing.key_financial_data,), lambda row: row.key_financial_data),
+    "pdf_links": ((CompanyListing.pdf_links,), lambda row: row.pdf_links or []),
+}
+
+
+def listing_columns(selected_fields):
+    """Columns to select for `selected_fields`; name and id are always needed for ordering and cursors."""
+    columns = [CompanyListing.company_id, CompanyListing.company_name]
+    for field in selected_fields:
+        for column in LISTING_FIELDS[field][0]:
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def apply_listing_filters(db, query, search, show_inactive, approval_filter, ranges=()):
+    """
+    Listing filters on the company_listing read model. `ranges` holds
+    (metric, low, high) bounds, inclusive, with None for an open end.
+    """
+    # Search filter (ngram FULLTEXT index on MySQL, see app/utils/search.py)
     if search and search.strip():
-        search_term = f"%{search.strip()}%"
-        base_query = base_query.filter(CompanyData.company_name.ilike(search_term))
+        query = query.filter(name_search_filter(db, CompanyListing.company_name, search))
     else:
         # Active/inactive filter applies only when no search is provided
-        base_query = base_query.join(
-            KeyFinancialData, CompanyData.key_financial_data_id == KeyFinancialData.id, isouter=True
-        )
         if not show_inactive:
             # Only active
-            base_query = base_query.filter(KeyFinancialData.company_status == "Active")
+            query = query.filter(CompanyListing.company_status == "Active")
         else:
             # Only inactive
-            base_query = base_query.filter(KeyFinancialData.company_status== "Inactive")
-    
+            query = query.filter(CompanyListing.company_status == "Inactive")
+
     # Approval filter - applies regardless of search
     if approval_filter != 'all':
         if approval_filter == 'approved':
-            base_query = base_query.filter(CompanyData.approval_stage == 1)
+            query = query.filter(CompanyListing.approval_stage == 1)
         elif approval_filter == 'unapproved':
-            base_query = base_query.filter(CompanyData.approval_stage.in_([0, 2]))
+            query = query.filter(CompanyListing.approval_stage.in_([0, 2]))
+
+    for metric, low, high in ranges:
+        column = METRIC_COLUMNS[metric]
+        if low is not None:
+            query = query.filter(column >= low)
+        if high is not None:
+            query = query.filter(column <= high)
+
+    return query
+
+
+def listing_ranges(
+    min_turnover: Optional[float] = None,
+    max_turnover: Optional[float] = None,
+    min_fair_value: Optional[float] = None,
+    max_fair_value: Optional[float] = None,
+    min_surplus: Optional[float] = None,
+    max_surplus: Optional[float] = None,
+    modified_from: Optional[datetime] = None,
+    modified_to: Optional[datetime] = None,
+):
+    """Range filter query parameters, as the (metric, low, high) tuples apply_listing_filters takes."""
+    return tuple(
+        (metric, low, high)
+        for metric, low, high in (
+            ("turnover", min_turnover, max_turnover),
+            ("fair_value", min_fair_value, max_fair_value),
+            ("surplus", min_surplus, max_surplus),
+            ("last_modified", modified_from, modified_to),
+        )
+        if low is not None or high is not None
+    )
+
+
+def parse_listing_fields(fields):
+    """Sparse fieldsets: fields=id,company_name,status returns just those keys."""
+    if not fields:
+        return list(LISTING_FIELDS)
+    selected_fields = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in selected_fields if field not in LISTING_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected_fields
+
+
+def check_sort_field(sort_field):
+    if sort_field != 'company_name' and sort_field not in METRIC_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort_field '{sort_field}'")
+
+
+def ordered_listing_queries(db, query, search, sort_by, sort_field):
+    """
+    The listing query with its ORDER BY (id breaks ties so keyset cursors are
+    stable), as a list of queries whose results follow one another; sort_field
+    must be checked first.
+
+    Metric sorts ORDER BY the bare (metric, company_id) so that, behind the
+    company_status filter, MySQL reads the (company_status, metric,
+    company_id) index in order instead of sorting. Companies without the
+    figure go last either way: for desc that is MySQL's own NULL order, for
+    asc they come from a second query. A search has no company_status prefix,
+    so there the matched rows are sorted.
+    """
+    if sort_field in METRIC_COLUMNS and sort_by in ('asc', 'desc'):
+        column = METRIC_COLUMNS[sort_field]
+        if sort_by == 'asc':
+            return [
+                query.filter(column.isnot(None)).order_by(column.asc(), CompanyListing.company_id.asc()),
+                query.filter(column.is_(None)).order_by(CompanyListing.company_id.asc()),
+            ]
+        return [query.order_by(column.desc(), CompanyListing.company_id.desc())]
+    if sort_by == 'asc':
+        return [query.order_by(CompanyListing.company_name.asc(), CompanyListing.company_id.asc())]
+    if sort_by == 'desc':
+        return [query.order_by(CompanyListing.company_name.desc(), CompanyListing.company_id.desc())]
+    if sort_by == 'relevance':
+        # Best matches first; without a search there is nothing to rank, so fall back to name order
+        if search and search.strip():
+            query = query.order_by(*relevance_order(db, CompanyListing.company_name, search))
+        return [query.order_by(CompanyListing.company_name.asc(), CompanyListing.company_id.asc())]
+    return [query]
+
+
+def fetch_listing_page(queries, offset, limit):
+    """
+    offset/limit across the queries from ordered_listing_queries. A query is
+    only counted when the page runs past its end.
+    """
+    rows = []
+    for i, query in enumerate(queries):
+        rows += query.offset(offset).limit(limit - len(rows)).all()
+        if len(rows) >= limit or i == len(queries) - 1:
+            break
+        offset = max(0, offset - query.order_by(None).count())
+    return rows
+
+
+def listing_etag(db, *params):
+    """
+    Weak ETag for a listing request. The listing version goes up after every
+    committed write to the read model, so together with the query parameters
+    it identifies the response.
+    """
+    return weak_etag(listing_version(db), *params)
+
+
+@router.get(
+    "/company-data",
+    response_class=ORJSONResponse,
+    responses={200: {"model": CompanyListingResponse}},
+)
+def get_company_data(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    page: int = 1,
+    per_page: int = 100,
+    search: str = None,
+    sort_by: str = 'asc',
+    sort_field: str = 'company_name',
+    show_inactive: bool = False,
+    approval_filter: str = 'all',
+    cursor: str = None,
+    estimate_total: bool = False,
+    ranges: tuple = Depends(listing_ranges),
+    fields: str = None
+):
+    selected_fields = parse_listing_fields(fields)
+    check_sort_field(sort_field)
+
+    # Everything the listing shows comes from the company_listing read model,
+    # which the write paths keep up to date (see app/crud/company_listing.py)
+    etag = listing_etag(
+        db, page, per_page, search, sort_by, sort_field, show_inactive, approval_filter, cursor, estimate_total, ranges,
+        selected_fields,
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    base_query = apply_listing_filters(db, db.query(CompanyListing.company_id), search, show_inactive, approval_filter, ranges)
+
+    # Total: served from the count cache when possible; with estimate_total a
+    # search only counts up to LISTING_ESTIMATE_COUNT_CAP rows
+    has_search = bool(search and search.strip())
+    estimated = estimate_total and has_search
+    count_key = (
+        search.strip().lower() if has_search else None,
+        None if has_search else show_inactive,
+        approval_filter,
+        estimated,
+        ranges,
+    )
+    cached = listing_counts.get(count_key)
+    if cached is not None:
+        total = cached
+    else:
+        generation = listing_counts.generation()
+        if estimated:
+            capped = base_query.limit(LISTING_ESTIMATE_COUNT_CAP).subquery()
+            total = db.query(func.count()).select_from(capped).scalar()
+        else:
+            total = base_query.count()
+        listing_counts.set(count_key, total, generation)
+    total_is_estimate = estimated and total >= LISTING_ESTIMATE_COUNT_CAP
+
+    page_query = apply_listing_filters(db, db.query(*listing_columns(selected_fields)), search, show_inactive, approval_filter, ranges)
+    page_queries = ordered_listing_queries(db, page_query, search, sort_by, sort_field)
 
     # Pagination
-    total = base_query.count()
-    offset = (page - 1) * per_page
-    companies = base_query.offset(offset).limit(per_page).all()
-
-    # --- preload related data ---
-    key_data_ids = [c.key_financial_data_id for c in companies if c.key_financial_data_id]
-    key_data_list = db.query(KeyFinancialData).filter(KeyFinancialData.id.in_(key_data_ids)).all()
-    key_data_map = {k.id: k for k in key_data_list}
-
-    registered_numbers = [kfd.company_registered_number for kfd in key_data_list if kfd.company_registered_number]
-    pdf_data_map = {}
-    if registered_numbers:
-        pdf_data_list = db.query(CompanyPDFs).filter(
-            CompanyPDFs.company_registered_number.in_(registered_numbers)
-        ).all()
-        pdf_data_map = {pdf.company_registered_number: pdf.pdf_links or [] for pdf in pdf_data_list}
-
-    def extract_latest(json_data):
-        if not json_data or not isinstance(json_data, dict):
-            return None
+    if cursor:
+        # Keyset mode: seek past the last row of the previous page instead of
+        # scanning and discarding `offset` rows
+        if sort_by not in ('asc', 'desc') or sort_field != 'company_name':
+            raise HTTPException(status_code=400, detail="cursor requires sort_by 'asc' or 'desc' on company_name")
         try:
-            years = sorted(json_data.keys(), reverse=True)
-            return json_data[years[0]] if years else None
-        except Exception:
-            return None
-
-    # Track updates
-    updated = False
-    result = []
-
-    for c in companies:
-        key_financial_data = None
-        if c.key_financial_data_id in key_data_map:
-            kfd = key_data_map[c.key_financial_data_id]
-            # Use the existing company_status from database instead of overriding it
-            status_value = kfd.company_status or ("Active" if kfd.company_registered_number else "Inactive")
-
-            # Only update DB if company_status is None/empty, don't override existing status
-            if not kfd.company_status:
-                kfd.company_status = status_value
-                updated = True
-
-            key_financial_data = {
-                "company_status": kfd.company_status,
-                "company_registered_number": kfd.company_registered_number,
-                "incorporation_date": kfd.incorporation_date,
-                "latest_accounts_date": kfd.latest_accounts_date,
-                "Name_of_Defined_Benefit_Arrangement_1": kfd.Name_of_Defined_Benefit_Arrangement_1,
-                "Status_of_Defined_Benefit_Arrangement_1": kfd.Status_of_Defined_Benefit_Arrangement_1,
-                "scheme_actuary_1": kfd.scheme_actuary_1,
-                "scheme_actuary_firm_1": kfd.scheme_actuary_firm_1,
-                "Name_of_Defined_Benefit_Arrangement_2": kfd.Name_of_Defined_Benefit_Arrangement_2,
-                "Status_of_Defined_Benefit_Arrangement_2": kfd.Status_of_Defined_Benefit_Arrangement_2,
-                "scheme_actuary_2": kfd.scheme_actuary_2,
-                "scheme_actuary_firm_2": kfd.scheme_actuary_firm_2,
-                "Name_of_Defined_Benefit_Arrangement_3": kfd.Name_of_Defined_Benefit_Arrangement_3,
-                "Status_of_Defined_Benefit_Arrangement_3": kfd.Status_of_Defined_Benefit_Arrangement_3,
-                "scheme_actuary_3": kfd.scheme_actuary_3,
-                "scheme_actuary_firm_3": kfd.scheme_actuary_firm_3,
-            }
-        else:
-            status_value = "Inactive"
-
-        result.append({
-            "id": c.id,
-            "company_name": c.company_name,
-            "registration_number": key_data_map[c.key_financial_data_id].company_registered_number
-                if c.key_financial_data_id in key_data_map else None,
-            "company_status": status_value,
-            "approval_stage": c.approval_stage,
-            "status": c.status,
-            "type_of_scheme": c.type_of_scheme,
-            "last_modified": c.last_modified,
-            "turnover_latest": extract_latest(key_data_map[c.key_financial_data_id].turnover_data)
-                if c.key_financial_data_id in key_data_map else None,
-            "assets_fair_value_latest": extract_latest(key_data_map[c.key_financial_data_id].fair_value_assets)
-                if c.key_financial_data_id in key_data_map else None,
-            "turnover_data": key_data_map[c.key_financial_data_id].turnover_data
-                if c.key_financial_data_id in key_data_map else {},
-            "fair_value_assets": key_data_map[c.key_financial_data_id].fair_value_assets
-                if c.key_financial_data_id in key_data_map else {},
-            "people_page_link": c.people_page_link or f"/people/{c.id}",
-            "key_financial_data": key_financial_data,
-            "pdf_links": pdf_data_map.get(
-                key_data_map[c.key_financial_data_id].company_registered_number, []
-            ) if c.key_financial_data_id in key_data_map else [],
-        })
-
-    if updated:
-        db.commit()
+            after_name, after_id = decode_cursor(cursor, sort_by)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+        rows = (
+            page_queries[0]
+            .filter(keyset_after(CompanyListing.company_name, CompanyListing.company_id, after_name, after_id, sort_by))
+            .limit(per_page)
+            .all()
+        )
+    else:
+        offset = (page - 1) * per_page
+        rows = fetch_listing_page(page_queries, offset, per_page)
 
-    return {
+    next_cursor = None
+    if sort_by in ('asc', 'desc') and sort_field == 'company_name' and len(rows) == per_page:
+        next_cursor = encode_cursor(rows[-1].company_name, rows[-1].company_id, sort_by)
+
+    result = [{field: LISTING_FIELDS[field][1](row) for field in selected_fields} for row in rows]
+
+    # Returned as an ORJSONResponse directly, skipping jsonable_encoder
+    response = ORJSONResponse({
         "data": result,
         "pagination": {
             "total": total,
             "page": page,
             "per_page": per_page,
-            "total_pages": (total + per_page - 1) // per_page
+            "total_pages": (total + per_page - 1) // per_page,
+            "next_cursor": next_cursor,
+            "total_is_estimate": total_is_estimate,
         }
-    }
+    })
+    set_etag(response, etag)
+    return response
 
 
+@router.get("/company-data/stream")
+def stream_company_data(
+    current_user: dict = Depends(get_current_user),
+    search: str = None,
+    sort_by: str = 'asc',
+    sort_field: str = 'company_name',
+    show_inactive: bool = False,
+    approval_filter: str = 'all',
+    ranges: tuple = Depends(listing_ranges),
+    fields: str = None
+):
+    """
+    The whole filtered listing as NDJSON, one company per line, for bulk
+    consumers. Takes the listing's filters, ordering and fields= but no
+    pagination: rows come off a server-side cursor in LISTING_STREAM_BATCH_SIZE
+    batches, so memory use does not grow with the result.
+    """
+    selected_fields = parse_listing_fields(fields)
+    check_sort_field(sort_field)
 
-@router.post("/upload-file")
-def upload_file(
+    def generate():
+        # get_db's session is closed before a StreamingResponse body runs, so
+        # the stream opens its own and holds it until the last row is sent
+        db = SessionLocal()
+        try:
+            query = apply_listing_filters(db, db.query(*listing_columns(selected_fields)), search, show_inactive, approval_filter, ranges)
+            lines = []
+            for ordered_query in ordered_listing_queries(db, query, search, sort_by, sort_field):
+                for row in ordered_query.yield_per(LISTING_STREAM_BATCH_SIZE):
+                    lines.append(orjson.dumps({field: LISTING_FIELDS[field][1](row) for field in selected_fields}))
+                    if len(lines) >= LISTING_STREAM_BATCH_SIZE:
+                        yield b"\n".join(lines) + b"\n"
+                        lines = []
+            if lines:
+                yield b"\n".join(lines) + b"\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+def _db_utcnow(db):
+    # The database's clock, shared by every worker; other dialects (local runs) use ours
+    if db.get_bind().dialect.name == "mysql":
+        return db.query(func.utc_timestamp()).scalar()
+    return datetime.utcnow()
+
+
+@router.post(
+    "/company-status",
+    response_class=ORJSONResponse,
+    responses={200: {"model": CompanyStatusResponse}},
+)
+def get_company_status(
+    data: CompanyStatusRequest,
     current_user: dict = Depends(get_current_user),
-    file: UploadFile = File(...), 
     db: Session = Depends(get_db)
 ):
-    try:
-        if not file.filename.endswith(".csv"):
-            raise HTTPException(status_code=400, detail="Only CSV files are supported")
+    """
+    status, approval_stage and last_modified for the given company ids. With
+    `since`, only companies modified at or after it come back (a range on the
+    (last_modified, status, approval_stage) index when that is the narrower
+    side); send the returned watermark as the next `since`.
+
+    Writers stamp last_modified before they commit, so the watermark is the
+    database clock minus COMPANY_STATUS_WATERMARK_MARGIN rather than the
+    newest row returned: a change that commits late still falls inside the
+    next poll. Companies changed within the margin can be returned again.
+    """
+    if len(data.ids) > COMPANY_STATUS_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {COMPANY_STATUS_MAX_IDS} ids per request")
+
+    query = db.query(
+        CompanyData.id, CompanyData.status, CompanyData.approval_stage, CompanyData.last_modified
+    ).filter(CompanyData.id.in_(set(data.ids)))
+    if data.since is not None:
+        query = query.filter(CompanyData.last_modified >= data.since)
+    # Read before the rows, so nothing committed after this query can fall behind it
+    watermark = _db_utcnow(db) - timedelta(seconds=COMPANY_STATUS_WATERMARK_MARGIN)
+    rows = query.all()
+
+    return ORJSONResponse({
+        "companies": [
+            {
+                "id": row.id,
+                "status": row.status,
+                "approval_stage": row.approval_stage,
+                "last_modified": row.last_modified,
+            }
+            for row in rows
+        ],
+        "watermark": watermark,
+    })
 
-        # contents = file.file.read().decode("utf-8")
-        
+
+@router.post("/company-status/events/token")
+def company_status_events_token(current_user: dict = Depends(get_current_user)):
+    """Short-lived token for the `token` parameter of GET /company-status/events."""
+    return {"token": create_stream_token(current_user["email"]), "expires_in": STATUS_EVENTS_TOKEN_TTL}
+
+
+@router.get("/company-status/events")
+async def company_status_events(current_user: dict = Depends(get_current_user_from_query)):
+    """
+    Server-sent events with {company_id, status, last_modified} whenever a
+    company's status changes, so clients can update single rows instead of
+    refetching the listing. EventSource cannot send headers, so the `token`
+    query parameter carries a token from POST /company-status/events/token;
+    it is only checked on connect, so fetch a new one before reconnecting.
+    """
+    subscriber = status_broker.subscribe()
+    _, queue = subscriber
+
+    async def stream():
         try:
-            contents = file.file.read().decode("utf-8")
-        except UnicodeDecodeError:
-            file.file.seek(0)
-            contents = file.file.read().decode("cp1252")
-        csv_reader = csv.DictReader(StringIO(contents))
-        required_fields = ["Company", "Address1", "Address2", "Address3", "City", "County"]
-
-        for row in csv_reader:
-            company_name = row.get("Company")
-            if not company_name:
-                continue
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STATUS_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Comment line, keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: status\ndata: {orjson.dumps(event).decode()}\n\n"
+        finally:
+            status_broker.unsubscribe(subscriber)
 
-            # Normalize company name (so matching works consistently)
-            company_name = company_name.replace("Ltd.", "Limited").replace("Ltd", "Limited").strip()
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-            address_parts = [
-                row.get("Address1"),
-                row.get("Address2"),
-                row.get("Address3"),
-                row.get("City"),
-                row.get("County"),
-            ]
-            full_address = ", ".join([part for part in address_parts if part])
 
-            # 🔹 1. Check if the company already exists
-            existing_company = (
-                db.query(CompanyData)
-                .filter(CompanyData.company_name == company_name)
-                .first()
-            )
+@router.post("/upload-file", status_code=202)
+def upload_file(
+    current_user: dict = Depends(get_current_user),
+    file: UploadFile = File(...), 
+    db: Session = Depends(get_db)
+):
+    if not file.filename.endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Only CSV files are supported")
 
-            if existing_company:
-                # 🔹 2. If it exists, set status to "Processing"
-                existing_company.status = "Processing"
-                existing_company.last_modified = datetime.utcnow()
-                db.commit()
-                db.refresh(existing_company)
-                print(f"Updated {company_name} status to Processing")
-
-            try:
-                api_response = requests.post(
-                    PROCESS_COMPANY_API,
-                    json={
-                        "company": company_name,
-                        "address": full_address
-                    }
-                )
-                print(api_response.status_code, api_response.json());
-           
-                if api_response.status_code == 200:
-                    
-                    csv_record = CSVFileData(
-                        company_name=company_name,
-                        address1=row.get("Address1"),
-                        address2=row.get("Address2"),
-                        address3=row.get("Address3"),
-                        city=row.get("City"),
-                        county=row.get("County"),
-                    )
-                    db.add(csv_record)
-                    db.commit()
-
-                else:
-                    print(f"API failed for {company_name}: {api_response.status_code}")
-
-            except Exception as e:
-                print(f"Error fetching API data for {company_name}: {e}")
-                db.rollback()
-
-        return {"message": "File processed successfully. Status updated to Processing for existing companies."}
+    try:
+        # Persist the upload so a background worker can process it after we respond
+        job_id = str(uuid.uuid4())
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        file_path = os.path.join(UPLOAD_DIR, f"{job_id}.csv")
+        with open(file_path, "wb") as out:
+            shutil.copyfileobj(file.file, out)
+
+        job = UploadJob(id=job_id, filename=file.filename, file_path=file_path, status="Queued")
+        db.add(job)
+        db.commit()
 
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to process file: {str(e)}")
 
+    submit_upload_job(job_id)
+
+    return {
+        "message": "File uploaded successfully. Companies will be processed in the background.",
+        "job_id": job_id,
+        "filename": file.filename,
+    }
+
+
+@router.get("/upload-jobs/{job_id}")
+def get_upload_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+
+    elapsed = 0.0
+    if job.started_at:
+        elapsed = ((job.finished_at or datetime.utcnow()) - job.started_at).total_seconds()
+
+    return {
+        "job_id": job.id,
+        "filename": job.filename,
+        "status": job.status,
+        "rows_processed": job.rows_processed or 0,
+        "rows_succeeded": job.rows_succeeded or 0,
+        "rows_failed": job.rows_failed or 0,
+        "rows_deferred": job.rows_deferred or 0,
+        "rows_duplicate": job.rows_duplicate or 0,
+        "elapsed_seconds": round(elapsed, 2),
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
 
 @router.post("/reprocess-company/{company_id}")
 def reprocess_company(
@@ -366,14 +669,13 @@ def reprocess_company(
    
     # 2. Set status to "Processing" to indicate reprocessing has started
     company.status = "Processing"
+    refresh_company_listing(db, [company.id])
     db.commit()
+    publish_company_status(db, [company.id])
 
     try:
         # 3. Call the external AI processing service
-        api_response = requests.post(
-           REPROCESS_COMPANY_API,
-            json={"registration_id": registration_number}
-        )
+        api_response = ml_client.reprocess_company(registration_number)
         print(f"API response for {company.company_name}: {api_response.status_code}")
         if api_response.status_code == 200:
             pass
@@ -381,11 +683,23 @@ def reprocess_company(
             company.status = "Not Started"
             print(f"API failed for {company.company_name}: {api_response.status_code}")
 
+    except ml_client.CircuitOpenError:
+        # ML service is known to be down: keep the company Processing and retry later
+        if ml_client.defer(
+            ml_client.reprocess_company, registration_number,
+            on_result=_reset_status_on_failure([company.id]),
+        ):
+            print(f"ML service unavailable, queued reprocess for {company.company_name}")
+        else:
+            company.status = "Not Started"
+
     except Exception as e:
         print(f"Reprocess failed: {e}")
         company.status = "Not Started"
 
+    refresh_company_listing(db, [company.id])
     db.commit()
+    publish_company_status(db, [company.id])
 
     # Return both message and new_status for frontend
     return {
@@ -404,72 +718,152 @@ def reprocess_companies_bulk(
     if not company_ids or not isinstance(company_ids, list):
         raise HTTPException(status_code=400, detail="company_ids must be a non-empty list")
 
-    companies = db.query(CompanyData).filter(CompanyData.id.in_(company_ids)).all()
-    if not companies:
+    # 1. Resolve every registration number with one join
+    rows = (
+        db.query(CompanyData.id, KeyFinancialData.company_registered_number)
+        .outerjoin(KeyFinancialData, CompanyData.key_financial_data_id == KeyFinancialData.id)
+        .filter(CompanyData.id.in_(company_ids))
+        .all()
+    )
+    if not rows:
         raise HTTPException(status_code=404, detail="No valid companies found")
 
-    registration_numbers = []
-    for company in companies:
-        db.refresh(company)
-        key_data = (
-            db.query(KeyFinancialData)
-            .filter(KeyFinancialData.id == company.key_financial_data_id)
-            .first()
-        )
-
-        if not key_data or not key_data.company_registered_number:
-            company.status = "Not Started"
-            continue
-
-        registration_number = key_data.company_registered_number
-        registration_numbers.append(registration_number)
-        company.status = "Processing"
+    to_process = [(company_id, registration_number) for company_id, registration_number in rows if registration_number]
+    processing_ids = [company_id for company_id, _ in to_process]
+    missing_ids = [company_id for company_id, registration_number in rows if not registration_number]
 
+    # 2. One UPDATE per status
+    _set_company_status(db, processing_ids, "Processing")
+    _set_company_status(db, missing_ids, "Not Started")
+    refresh_company_listing(db, processing_ids + missing_ids)
     db.commit()
+    publish_company_status(db, processing_ids + missing_ids)
 
-    if not registration_numbers:
+    if not to_process:
         raise HTTPException(status_code=400, detail="No valid registration numbers found")
 
-    try:
-        print("before processing api call")
-        payload_to_send = {"registration_ids": registration_numbers}
-        api_response = requests.post(REPROCESS_COMPANY_API, json=payload_to_send)
-        print("after processing api call")
-
-        if api_response.status_code != 200:
-            for company in companies:
-                company.status = "Not Started"
-            db.commit()
-            raise HTTPException(
-                status_code=502,
-                detail=f"ML service failed with status {api_response.status_code}",
-            )
+    # 3. Send the registration numbers in chunks, several chunks at a time
+    chunks = [
+        to_process[i:i + REPROCESS_BULK_CHUNK_SIZE]
+        for i in range(0, len(to_process), REPROCESS_BULK_CHUNK_SIZE)
+    ]
 
-    except requests.exceptions.RequestException as e:
-        for company in companies:
-            company.status = "Not Started"
-        db.commit()
-        raise HTTPException(status_code=500, detail=f"Failed to reach ML service: {str(e)}")
-    except Exception as e:
-        for company in companies:
-            company.status = "Not Started"
+    def call_reprocess_api(chunk):
+        return ml_client.reprocess_companies([registration_number for _, registration_number in chunk])
+
+    failed_ids = []
+    deferred_count = 0
+    for chunk, api_response, error in run_concurrently(chunks, call_reprocess_api, REPROCESS_BULK_CONCURRENCY):
+        chunk_ids = [company_id for company_id, _ in chunk]
+        if isinstance(error, ml_client.CircuitOpenError):
+            # ML service is known to be down: keep the chunk Processing and retry later
+            if ml_client.defer(
+                ml_client.reprocess_companies, [registration_number for _, registration_number in chunk],
+                on_result=_reset_status_on_failure(chunk_ids),
+            ):
+                deferred_count += len(chunk)
+            else:
+                print(f"Retry queue full, dropping reprocess of {len(chunk)} companies")
+                failed_ids.extend(chunk_ids)
+        elif error is not None:
+            print(f"Bulk reprocess failed for {len(chunk)} companies: {error}")
+            failed_ids.extend(chunk_ids)
+        elif api_response.status_code != 200:
+            print(f"ML service failed with status {api_response.status_code} for {len(chunk)} companies")
+            failed_ids.extend(chunk_ids)
+
+    # 4. Put the companies of failed chunks back to "Not Started" in one UPDATE
+    if failed_ids:
+        _set_company_status(db, failed_ids, "Not Started")
+        refresh_company_listing(db, failed_ids)
         db.commit()
-        raise HTTPException(status_code=500, detail=f"Bulk reprocess failed: {str(e)}")
+        publish_company_status(db, failed_ids)
+
+    if len(failed_ids) == len(to_process):
+        raise HTTPException(status_code=502, detail=f"ML service failed for all {len(to_process)} companies")
+
+    triggered_count = len(to_process) - len(failed_ids) - deferred_count
+    if deferred_count and not triggered_count:
+        return JSONResponse(
+            content={
+                "message": f"ML service unavailable, reprocess queued for {deferred_count} companies",
+                "new_status": "Processing",
+                "failed_ids": failed_ids,
+            },
+            status_code=202
+        )
 
-    final_status = "Processing"
-    db.commit()
+    message = f"Reprocess triggered successfully for {triggered_count} companies"
+    if deferred_count:
+        message += f", queued for {deferred_count}"
+    if failed_ids:
+        message += f", failed for {len(failed_ids)}"
 
     return JSONResponse(
         content={
-            "message": f"Reprocess triggered successfully for {len(registration_numbers)} companies",
-            "new_status": final_status,
+            "message": message,
+            "new_status": "Processing",
+            "failed_ids": failed_ids,
         },
         status_code=200
     )
 
+def _set_company_status(db, company_ids, status):
+    if company_ids:
+        db.query(CompanyData).filter(CompanyData.id.in_(company_ids)).update(
+            {CompanyData.status: status, CompanyData.last_modified: datetime.utcnow()},
+            synchronize_session=False,
+        )
+
+def _reset_status_on_failure(company_ids):
+    """Result handler for a deferred reprocess call: undo "Processing" if it fails."""
+    def on_result(api_response):
+        if api_response is not None and api_response.status_code == 200:
+            return
+        db = SessionLocal()
+        try:
+            _set_company_status(db, company_ids, "Not Started")
+            refresh_company_listing(db, company_ids)
+            db.commit()
+            publish_company_status(db, company_ids)
+        finally:
+            db.close()
+
+    return on_result
+
+@router.post("/ml-service/callback", status_code=202)
+def ml_service_callback(
+    batch: MLCallbackBatch,
+    x_ml_callback_secret: str = Header(None),
+):
+    """
+    Called by the ML service with {"results": [{registration_id, outcome}]}
+    when companies finish. Outcomes are buffered and written in one UPDATE
+    per ML_CALLBACK_FLUSH_INTERVAL (see app/utils/ml_callbacks.py).
+    """
+    if not ML_CALLBACK_SECRET:
+        raise HTTPException(status_code=503, detail="ML callback is not configured")
+    if not x_ml_callback_secret or not hmac.compare_digest(x_ml_callback_secret, ML_CALLBACK_SECRET):
+        raise HTTPException(status_code=401, detail="Invalid callback secret")
+
+    ml_callbacks.record_outcomes((item.registration_id, item.outcome) for item in batch.results)
+    return {"accepted": len(batch.results), "pending": ml_callbacks.pending_count()}
+
+@router.get("/ml-service/stats")
+def get_ml_service_stats(current_user: dict = Depends(get_current_user)):
+    """Latency, circuit breaker state and retry backlog for the ML processing service"""
+    return {
+        "latency": ml_client.get_latency_stats(),
+        "circuit": ml_client.breaker.state,
+        "deferred_calls": ml_client.deferred_count(),
+        "pending_callbacks": ml_callbacks.pending_count(),
+    }
+
 @router.get("/key-financial-data/{company_id}")
 def get_key_financial_data(
     company_id: int,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -483,6 +877,16 @@ def get_key_financial_data(
     if not key_data:
         raise HTTPException(status_code=404, detail="Key Financial Data not found")
 
+    # The ML service updates these rows without touching a timestamp, so the
+    # watermark is the row's own column values
+    etag = weak_etag(
+        company.last_modified,
+        [getattr(key_data, attr.key) for attr in KeyFinancialData.__mapper__.column_attrs],
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     return key_data
 
 
@@ -917,6 +1321,7 @@ def update_registration_number(
         .filter(KeyFinancialData.company_registered_number == new_number)
         .all()
     )
+    removed_kfd_ids = [entry.id for entry in existing_entries_with_reg_num]
     for entry in existing_entries_with_reg_num:
         db.delete(entry)
     
@@ -928,6 +1333,7 @@ def update_registration_number(
             .first()
         )
         if remaining_old_data:
+            removed_kfd_ids.append(remaining_old_data.id)
             db.delete(remaining_old_data)
     
     # Flush all deletions before creating new entry
@@ -947,9 +1353,21 @@ def update_registration_number(
     company.key_financial_data_id = key_data.id
     # Explicitly mark the company record as modified (triggers last_modified update)
     db.add(company)
-    
+
+    # Other companies may have pointed at the key financial data deleted above
+    affected_ids = [company.id]
+    if removed_kfd_ids:
+        affected_ids += [
+            other_id
+            for (other_id,) in db.query(CompanyData.id)
+            .filter(CompanyData.key_financial_data_id.in_(removed_kfd_ids))
+            .all()
+        ]
+    refresh_company_listing(db, affected_ids)
+
     # Commit all changes
     db.commit()
+    publish_company_status(db, [company.id])
     db.refresh(company)
 
     return {
@@ -984,7 +1402,9 @@ def update_approval_stage(
     # Explicitly mark the company record as modified (triggers last_modified update)
     db.add(company)
     
+    refresh_company_listing(db, [company.id])
     db.commit()
+    publish_company_status(db, [company.id])
     db.refresh(company)
     
     return {
@@ -994,9 +1414,14 @@ def update_approval_stage(
     }
     
     
-@router.get("/people/{company_registered_number}")
+@router.get(
+    "/people/{company_registered_number}",
+    response_class=ORJSONResponse,
+    responses={200: {"model": List[PersonItem]}},
+)
 def get_people_for_company(
     company_registered_number: str,
+    request: Request,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1013,13 +1438,23 @@ def get_people_for_company(
 
     # If company exists, get all people for that registered number
     people = (
-        db.query(PeopleData)
+        db.query(
+            PeopleData.id,
+            PeopleData.name,
+            PeopleData.role,
+            PeopleData.appointment_date,
+            PeopleData.date_of_birth,
+            PeopleData.company_registered_number,
+        )
         .filter(PeopleData.company_registered_number == company_registered_number)
+        .order_by(PeopleData.id)
         .all()
     )
 
-    if not people:
-        return []
+    # people_data has no timestamps, so the rows themselves are the watermark
+    etag = weak_etag([tuple(person) for person in people])
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
     # Return people data
     result = [
@@ -1034,11 +1469,15 @@ def get_people_for_company(
         for person in people
     ]
 
-    return result
+    response = ORJSONResponse(result)
+    set_etag(response, etag)
+    return response
 
 @router.get("/summary-notes/{company_id}")
 def get_summary_notes(
     company_id: int,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1063,6 +1502,11 @@ def get_summary_notes(
     
     if not summary_notes:
         return {"summary": "No summary notes available for this company"}
+
+    etag = weak_etag(summary_notes.id, summary_notes.company_registered_number, summary_notes.created_at, summary_notes.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     
     return {
         "summary": summary_notes.summary,
@@ -1140,9 +1584,14 @@ def get_summary_by_registration(
         "updated_at": summary_notes.updated_at
     }
     
-@router.get("/company-pdfs/{registration_number}")
+@router.get(
+    "/company-pdfs/{registration_number}",
+    response_class=ORJSONResponse,
+    responses={200: {"model": CompanyPdfsResponse}},
+)
 def get_company_pdfs(
     registration_number: str,
+    request: Request,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1153,8 +1602,14 @@ def get_company_pdfs(
     
     if not company_pdfs or not company_pdfs.pdf_links:
         return {"pdf_links": []}
-    
-    return {"pdf_links": company_pdfs.pdf_links}
+
+    etag = weak_etag(company_pdfs.company_registered_number, company_pdfs.pdf_links)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    response = ORJSONResponse({"pdf_links": company_pdfs.pdf_links})
+    set_etag(response, etag)
+    return response
 
 @router.post("/import-key-financial-data")
 def import_key_financial_data(
@@ -1179,6 +1634,7 @@ def import_key_financial_data(
 
         update_count = 0
         error_rows = []
+        changed_company_ids = []
 
         for index, row in excel_data.iterrows():
             company_name = row.get("Company Name")
@@ -1187,7 +1643,7 @@ def import_key_financial_data(
                 continue
 
             company = db.query(CompanyData).filter(
-                CompanyData.company_name == company_name
+                CompanyData.company_name_normalized == normalize_company_name(str(company_name))
             ).first()
             print(company)
 
@@ -1343,9 +1799,12 @@ def import_key_financial_data(
 
             if changed:
                 company.last_modified = datetime.utcnow()
+                changed_company_ids.append(company.id)
                 update_count += 1
 
+        refresh_company_listing(db, changed_company_ids)
         db.commit()
+        publish_company_status(db, changed_company_ids)
 
         return {
             "message": f"Successfully updated {update_count} companies",
@@ -1418,7 +1877,9 @@ def delete_companies(
         
         if company_names:
             csv_deleted = db.query(CSVFileData).filter(
-                CSVFileData.company_name.in_(company_names)
+                CSVFileData.company_name_normalized.in_(
+                    {normalize_company_name(name) for name in company_names}
+                )
             ).delete(synchronize_session=False)
             deleted_counts['csv_records'] = csv_deleted
         
@@ -1432,6 +1893,11 @@ def delete_companies(
                 KeyFinancialData.id.in_(key_financial_ids)
             ).delete(synchronize_session=False)
             deleted_counts['key_financial'] = key_data_deleted
+
+        delete_company_listing(db, company_ids)
+        if registration_numbers:
+            # Companies sharing a registration number lose their PDF links too
+            refresh_company_listing_for_registrations(db, registration_numbers)
         
         db.commit()
         
@@ -12,3 +12,89 @@ DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
 
 REPROCESS_COMPANY_API = os.getenv("REPROCESS_COMPANY_API")
 PROCESS_COMPANY_API = os.getenv("PROCESS_COMPANY_API")
+
+# Maximum number of PROCESS_COMPANY_API calls in flight for a single upload
+PROCESS_COMPANY_CONCURRENCY = int(os.getenv("PROCESS_COMPANY_CONCURRENCY", "8"))
+# Companies per PROCESS_COMPANY_API request; 1 sends the original single-company payload
+PROCESS_COMPANY_BATCH_SIZE = int(os.getenv("PROCESS_COMPANY_BATCH_SIZE", "1"))
+
+# Uploaded CSV files are persisted here and processed by background workers
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "2"))
+# Rows handled per batch by the upload worker (progress is saved after each one)
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "200"))
+
+# Shared HTTP client for the ML processing service
+ML_CONNECT_TIMEOUT = float(os.getenv("ML_CONNECT_TIMEOUT", "5"))
+ML_READ_TIMEOUT = float(os.getenv("ML_READ_TIMEOUT", "60"))
+ML_POOL_SIZE = int(os.getenv("ML_POOL_SIZE", str(max(PROCESS_COMPANY_CONCURRENCY, 10))))
+
+# Retries and circuit breaker for the ML processing service
+ML_MAX_RETRIES = int(os.getenv("ML_MAX_RETRIES", "3"))
+ML_BACKOFF_BASE = float(os.getenv("ML_BACKOFF_BASE", "0.5"))
+ML_BACKOFF_MAX = float(os.getenv("ML_BACKOFF_MAX", "8"))
+ML_BREAKER_THRESHOLD = int(os.getenv("ML_BREAKER_THRESHOLD", "5"))
+ML_BREAKER_RESET_SECONDS = float(os.getenv("ML_BREAKER_RESET_SECONDS", "30"))
+# Calls rejected by the open breaker are queued and retried on this interval
+ML_RETRY_QUEUE_INTERVAL = float(os.getenv("ML_RETRY_QUEUE_INTERVAL", "30"))
+ML_RETRY_QUEUE_MAX = int(os.getenv("ML_RETRY_QUEUE_MAX", "10000"))
+ML_RETRY_QUEUE_MAX_ATTEMPTS = int(os.getenv("ML_RETRY_QUEUE_MAX_ATTEMPTS", "20"))
+
+# Listing totals are cached per filter combination for this many seconds
+# (writes made through this process invalidate the cache straight away)
+LISTING_COUNT_CACHE_TTL = float(os.getenv("LISTING_COUNT_CACHE_TTL", "30"))
+# With estimate_total=true, search totals stop counting at this many rows
+LISTING_ESTIMATE_COUNT_CAP = int(os.getenv("LISTING_ESTIMATE_COUNT_CAP", "1000"))
+
+# company_listing is checked against the source tables at startup and then on
+# this interval, to pick up rows the ML service writes directly to them. One
+# worker runs it at a time, and only rows that drifted are rewritten
+LISTING_REBUILD_INTERVAL = float(os.getenv("LISTING_REBUILD_INTERVAL", "300"))
+
+# Must match the MySQL server's ngram_token_size (default 2); shorter search
+# terms cannot use the full-text index and fall back to a LIKE scan
+SEARCH_NGRAM_TOKEN_SIZE = int(os.getenv("SEARCH_NGRAM_TOKEN_SIZE", "2"))
+
+# Missing key_financial_data.company_status values are filled in at startup and
+# then on this interval (the ML service inserts rows without one)
+STATUS_NORMALIZE_INTERVAL = float(os.getenv("STATUS_NORMALIZE_INTERVAL", "60"))
+
+# /company-data/stream fetches and writes rows in batches of this size
+LISTING_STREAM_BATCH_SIZE = int(os.getenv("LISTING_STREAM_BATCH_SIZE", "1000"))
+
+# Response compression (brotli when the package is installed, else gzip)
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Server-sent status events: each client buffers at most this many events, and
+# gets a keep-alive comment after this many idle seconds
+STATUS_EVENTS_QUEUE_SIZE = int(os.getenv("STATUS_EVENTS_QUEUE_SIZE", "1000"))
+STATUS_EVENTS_HEARTBEAT = float(os.getenv("STATUS_EVENTS_HEARTBEAT", "15"))
+# While clients are connected, company_data is polled on this interval for
+# changes written by other processes (the ML service, other API workers)
+STATUS_EVENTS_POLL_INTERVAL = float(os.getenv("STATUS_EVENTS_POLL_INTERVAL", "5"))
+STATUS_EVENTS_POLL_LIMIT = int(os.getenv("STATUS_EVENTS_POLL_LIMIT", "1000"))
+# Each poll re-reads changes stamped this many seconds before the newest one it
+# has seen, because last_modified is set before commit. Keep it above the
+# longest write transaction; changes already sent are not sent again
+STATUS_EVENTS_POLL_OVERLAP = float(os.getenv("STATUS_EVENTS_POLL_OVERLAP", "60"))
+# Lifetime of the URL token for the event stream; it is only checked on connect
+STATUS_EVENTS_TOKEN_TTL = int(os.getenv("STATUS_EVENTS_TOKEN_TTL", "60"))
+
+# Shared secret the ML service sends in X-ML-Callback-Secret when reporting
+# results; the callback endpoint is disabled while it is unset
+ML_CALLBACK_SECRET = os.getenv("ML_CALLBACK_SECRET")
+# Reported outcomes are buffered and written in one UPDATE per interval
+ML_CALLBACK_FLUSH_INTERVAL = float(os.getenv("ML_CALLBACK_FLUSH_INTERVAL", "2"))
+
+# Most ids a single POST /company-status may ask about
+COMPANY_STATUS_MAX_IDS = int(os.getenv("COMPANY_STATUS_MAX_IDS", "5000"))
+# The returned watermark trails the database clock by this many seconds, to
+# cover writes stamped before they commit; keep it above the longest one
+COMPANY_STATUS_WATERMARK_MARGIN = float(os.getenv("COMPANY_STATUS_WATERMARK_MARGIN", "60"))
+
+# Bulk reprocess sends registration numbers in chunks of this size, with up to
+# REPROCESS_BULK_CONCURRENCY chunk requests in flight at once
+REPROCESS_BULK_CHUNK_SIZE = int(os.getenv("REPROCESS_BULK_CHUNK_SIZE", "500"))
+REPROCESS_BULK_CONCURRENCY = int(os.getenv("REPROCESS_BULK_CONCURRENCY", "4"))
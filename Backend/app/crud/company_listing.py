@@ -0,0 +1,276 @@
+import math
+from datetime import datetime
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.models.company import CompanyData
+from app.models.company_listing import CompanyListing, CompanyListingVersion
+from app.models.company_pdfs import CompanyPDFs
+from app.models.key_financial_data import KeyFinancialData
+
+REFRESH_BATCH_SIZE = 1000
+
+SCHEME_FIELDS = [
+    "Name_of_Defined_Benefit_Arrangement_1",
+    "Status_of_Defined_Benefit_Arrangement_1",
+    "scheme_actuary_1",
+    "scheme_actuary_firm_1",
+    "Name_of_Defined_Benefit_Arrangement_2",
+    "Status_of_Defined_Benefit_Arrangement_2",
+    "scheme_actuary_2",
+    "scheme_actuary_firm_2",
+    "Name_of_Defined_Benefit_Arrangement_3",
+    "Status_of_Defined_Benefit_Arrangement_3",
+    "scheme_actuary_3",
+    "scheme_actuary_firm_3",
+]
+
+# The source columns a listing row is built from, fetched in one joined SELECT
+SOURCE_COLUMNS = [
+    CompanyData.id,
+    CompanyData.company_name,
+    CompanyData.approval_stage,
+    CompanyData.status,
+    CompanyData.type_of_scheme,
+    CompanyData.last_modified,
+    CompanyData.people_page_link,
+    KeyFinancialData.id.label("kfd_id"),
+    KeyFinancialData.company_status,
+    KeyFinancialData.company_registered_number,
+    KeyFinancialData.incorporation_date,
+    KeyFinancialData.latest_accounts_date,
+    KeyFinancialData.turnover_data,
+    KeyFinancialData.fair_value_assets,
+    KeyFinancialData.surplus_data,
+    *[getattr(KeyFinancialData, field) for field in SCHEME_FIELDS],
+    CompanyPDFs.pdf_links,
+]
+
+
+def extract_latest(json_data):
+    if not json_data or not isinstance(json_data, dict):
+        return None
+    try:
+        years = sorted(json_data.keys(), reverse=True)
+        return json_data[years[0]] if years else None
+    except Exception:
+        return None
+
+
+def _as_float(value):
+    # Sort/filter key only: the API returns the raw latest value from the JSON
+    # column, so a non-numeric figure is shown as-is and just sorts as NULL
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _listing_row(row, now):
+    key_financial_data = None
+    if row.kfd_id is not None:
+        key_financial_data = {
+            "company_status": row.company_status or ("Active" if row.company_registered_number else "Inactive"),
+            "company_registered_number": row.company_registered_number,
+            "incorporation_date": row.incorporation_date,
+            "latest_accounts_date": row.latest_accounts_date,
+        }
+        for field in SCHEME_FIELDS:
+            key_financial_data[field] = getattr(row, field)
+
+    pdf_links = (row.pdf_links or []) if row.company_registered_number else []
+
+    return {
+        "company_id": row.id,
+        "company_name": row.company_name,
+        "key_financial_data_id": row.kfd_id,
+        "company_status": row.company_status,
+        "registration_number": row.company_registered_number,
+        "approval_stage": row.approval_stage,
+        "status": row.status,
+        "type_of_scheme": row.type_of_scheme,
+        "last_modified": row.last_modified,
+        "people_page_link": row.people_page_link,
+        "turnover_latest": _as_float(extract_latest(row.turnover_data)),
+        "assets_fair_value_latest": _as_float(extract_latest(row.fair_value_assets)),
+        "surplus_latest": _as_float(extract_latest(row.surplus_data)),
+        "pdf_count": len(pdf_links),
+        "turnover_data": row.turnover_data if row.kfd_id is not None else {},
+        "fair_value_assets": row.fair_value_assets if row.kfd_id is not None else {},
+        "key_financial_data": key_financial_data,
+        "pdf_links": pdf_links,
+        "refreshed_at": now,
+    }
+
+
+def _source_query(db: Session):
+    return (
+        db.query(*SOURCE_COLUMNS)
+        .select_from(CompanyData)
+        .outerjoin(KeyFinancialData, CompanyData.key_financial_data_id == KeyFinancialData.id)
+        .outerjoin(CompanyPDFs, CompanyPDFs.company_registered_number == KeyFinancialData.company_registered_number)
+    )
+
+
+_VERSION_DIRTY_KEY = "listing_version_dirty"
+
+
+def mark_listing_changed(db: Session):
+    """Moves the listing ETag on once the caller's transaction commits."""
+    db.info[_VERSION_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_version_on_commit(session):
+    # A short transaction of its own after the write has committed, so writers
+    # never queue on the single version row while holding their other locks
+    if not session.info.pop(_VERSION_DIRTY_KEY, False):
+        return
+    version = CompanyListingVersion.__table__
+    try:
+        with session.get_bind().begin() as conn:
+            conn.execute(update(version).where(version.c.id == 1).values(version=version.c.version + 1))
+    except Exception as e:
+        print(f"Could not bump the company_listing version: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_version_on_rollback(session):
+    session.info.pop(_VERSION_DIRTY_KEY, None)
+
+
+def listing_version(db: Session):
+    return db.query(CompanyListingVersion.version).filter(CompanyListingVersion.id == 1).scalar() or 0
+
+
+def _upsert_listing_rows(db: Session, listing_rows):
+    """
+    Inserts or overwrites listing rows in one statement, so writers racing on
+    a company_id that has no row yet (rebuild, refreshes from uploads and
+    callbacks) cannot fail on the primary key.
+    """
+    updated = [column.name for column in CompanyListing.__table__.columns if column.name != "company_id"]
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(CompanyListing.__table__)
+        stmt = stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in updated})
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(CompanyListing.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["company_id"], set_={name: stmt.excluded[name] for name in updated}
+        )
+    else:
+        db.execute(delete(CompanyListing).where(
+            CompanyListing.company_id.in_([listing_row["company_id"] for listing_row in listing_rows])
+        ))
+        db.bulk_insert_mappings(CompanyListing, listing_rows, render_nulls=True)
+        return
+    db.execute(stmt, listing_rows)
+
+
+def _write_listing_rows(db: Session, company_ids, listing_rows):
+    mark_listing_changed(db)
+    # Ids with no source row left lose their listing row
+    present = {listing_row["company_id"] for listing_row in listing_rows}
+    gone = [company_id for company_id in company_ids if company_id not in present]
+    if gone:
+        db.execute(delete(CompanyListing).where(CompanyListing.company_id.in_(gone)))
+    if listing_rows:
+        _upsert_listing_rows(db, listing_rows)
+
+
+def refresh_company_listing(db: Session, company_ids):
+    """
+    Rebuilds the company_listing rows for `company_ids` from company_data,
+    key_financial_data and company_pdfs. Ids with no company left are removed.
+    Runs in the caller's transaction; the caller commits.
+    """
+    # SessionLocal does not autoflush, so push pending ORM changes first
+    db.flush()
+    # Sorted, so concurrent refreshes and the rebuild lock rows in the same order
+    company_ids = sorted(set(company_ids))
+    now = datetime.utcnow()
+    for i in range(0, len(company_ids), REFRESH_BATCH_SIZE):
+        batch = company_ids[i:i + REFRESH_BATCH_SIZE]
+        rows = _source_query(db).filter(CompanyData.id.in_(batch)).all()
+        _write_listing_rows(db, batch, [_listing_row(row, now) for row in rows])
+
+
+def refresh_company_listing_for_registrations(db: Session, registration_numbers):
+    """refresh_company_listing for the companies linked to these registration numbers."""
+    company_ids = [
+        company_id
+        for (company_id,) in db.query(CompanyData.id)
+        .join(KeyFinancialData, CompanyData.key_financial_data_id == KeyFinancialData.id)
+        .filter(KeyFinancialData.company_registered_number.in_(set(registration_numbers)))
+        .all()
+    ]
+    refresh_company_listing(db, company_ids)
+
+
+def delete_company_listing(db: Session, company_ids):
+    mark_listing_changed(db)
+    db.execute(delete(CompanyListing).where(CompanyListing.company_id.in_(company_ids)))
+
+
+def _listing_differs(current, expected):
+    if current is None:
+        return True
+    for key, value in expected.items():
+        if key == "refreshed_at":
+            continue
+        stored = getattr(current, key)
+        if isinstance(value, float) and isinstance(stored, float):
+            # The metric columns are single-precision FLOAT on MySQL
+            if not math.isclose(stored, value, rel_tol=1e-6):
+                return True
+        elif stored != value:
+            return True
+    return False
+
+
+def rebuild_company_listing(db: Session):
+    """
+    Brings the whole read model in line with the source tables, in batches.
+    Picks up changes written straight to the source tables by other services
+    (the ML pipeline) and drops rows for companies that no longer exist.
+    Only rows that differ from what the sources give are rewritten, so a pass
+    over an up-to-date table is read-only. Returns the number of rows written.
+    """
+    written = 0
+    last_id = 0
+    while True:
+        rows = (
+            _source_query(db)
+            .filter(CompanyData.id > last_id)
+            .order_by(CompanyData.id)
+            .limit(REFRESH_BATCH_SIZE)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        current = {
+            row.company_id: row
+            for row in db.query(*CompanyListing.__table__.columns)
+            .filter(CompanyListing.company_id.in_([row.id for row in rows]))
+            .all()
+        }
+        now = datetime.utcnow()
+        stale = [
+            listing_row
+            for listing_row in (_listing_row(row, now) for row in rows)
+            if _listing_differs(current.get(listing_row["company_id"]), listing_row)
+        ]
+        if stale:
+            _write_listing_rows(db, [listing_row["company_id"] for listing_row in stale], stale)
+            written += len(stale)
+        db.commit()
+
+    result = db.execute(delete(CompanyListing).where(CompanyListing.company_id.not_in(select(CompanyData.id))))
+    if result.rowcount:
+        mark_listing_changed(db)
+    db.commit()
+    return written + result.rowcount
@@ -1,12 +1,39 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import user
 from app.db.base import Base
 from app.db.session import engine
+from app.core.config import COMPRESSION_MINIMUM_SIZE, GZIP_LEVEL, BROTLI_QUALITY
+from app.utils import ml_client, ml_callbacks
+from app.utils.compression import CompressionMiddleware
+from app.utils.maintenance import listing_rebuild_task, status_normalize_task
+from app.utils.status_events import status_poll_task
+from app.utils.upload_jobs import recover_upload_jobs
 
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ml_client.deferred_retry_task.start()
+    # Upload jobs interrupted by the last shutdown
+    recover_upload_jobs()
+    status_normalize_task.start()
+    listing_rebuild_task.start()
+    status_poll_task.start()
+    ml_callbacks.ml_callback_flush_task.start()
+    yield
+    ml_callbacks.ml_callback_flush_task.stop()
+    # Write whatever the ML service reported since the last flush
+    ml_callbacks.flush_outcomes()
+    status_poll_task.stop()
+    listing_rebuild_task.stop()
+    status_normalize_task.stop()
+    ml_client.deferred_retry_task.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,4 +43,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    gzip_level=GZIP_LEVEL,
+    brotli_quality=BROTLI_QUALITY,
+)
+
 app.include_router(user.router, prefix="/api")
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey,DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey,DateTime, Computed, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.utils.company_names import NORMALIZED_NAME_SQL
 from datetime import datetime
 
 class CompanyData(Base):
@@ -8,6 +9,7 @@ class CompanyData(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     company_name = Column(String(255), nullable=False)
+    company_name_normalized = Column(String(255), Computed(NORMALIZED_NAME_SQL, persisted=True), index=True)
     rating = Column(Integer)
     key_financial_data_id = Column(Integer, ForeignKey("key_financial_data.id"), unique=True)
     key_financial_data = relationship("KeyFinancialData", backref="company")
@@ -16,3 +18,12 @@ class CompanyData(Base):
     type_of_scheme = Column(String(100), nullable=True)
     last_modified = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     people_page_link = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        # Keyset pagination on the listing orders and seeks by (company_name, id)
+        Index("ix_company_data_company_name_id", "company_name", "id"),
+        # POST /company-status with `since`: a last_modified range read entirely from the index
+        Index("ix_company_data_last_modified_status_approval", "last_modified", "status", "approval_stage"),
+        # The status event poller's ORDER BY last_modified, id keyset scan
+        Index("ix_company_data_last_modified_id", "last_modified", "id"),
+    )
@@ -0,0 +1,59 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, JSON, Index, event, text
+from app.db.base import Base
+from datetime import datetime
+
+class CompanyListing(Base):
+    """
+    Denormalized read model behind GET /company-data: one row per company with
+    everything the listing shows, kept in step by app.crud.company_listing.
+    """
+    __tablename__ = "company_listing"
+
+    company_id = Column(Integer, primary_key=True, autoincrement=False)
+    company_name = Column(String(255), nullable=False)
+    key_financial_data_id = Column(Integer, nullable=True)
+    company_status = Column(String(50), nullable=True)
+    registration_number = Column(String(50), nullable=True)
+    approval_stage = Column(Integer, nullable=True)
+    status = Column(String(20), nullable=True)
+    type_of_scheme = Column(String(100), nullable=True)
+    last_modified = Column(DateTime, nullable=True)
+    people_page_link = Column(String(255), nullable=True)
+    turnover_latest = Column(Float, nullable=True)
+    assets_fair_value_latest = Column(Float, nullable=True)
+    surplus_latest = Column(Float, nullable=True)
+    pdf_count = Column(Integer, default=0)
+    turnover_data = Column(JSON, nullable=True)
+    fair_value_assets = Column(JSON, nullable=True)
+    key_financial_data = Column(JSON, nullable=True)
+    pdf_links = Column(JSON, nullable=True)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_company_listing_name_id", "company_name", "company_id"),
+        Index("ix_company_listing_status_name_id", "company_status", "company_name", "company_id"),
+        Index("ix_company_listing_approval_stage", "approval_stage"),
+        # sort_field / range filters on the latest figures
+        Index("ix_company_listing_status_turnover_id", "company_status", "turnover_latest", "company_id"),
+        Index("ix_company_listing_status_fair_value_id", "company_status", "assets_fair_value_latest", "company_id"),
+        Index("ix_company_listing_status_surplus_id", "company_status", "surplus_latest", "company_id"),
+        Index("ix_company_listing_status_modified_id", "company_status", "last_modified", "company_id"),
+        # Search box; other dialects just get a plain index
+        Index("ix_company_listing_name_fulltext", "company_name", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
+
+
+class CompanyListingVersion(Base):
+    """
+    Single row (id=1) whose version goes up right after every transaction that
+    writes to company_listing commits. It is the listing's ETag watermark.
+    """
+    __tablename__ = "company_listing_version"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+@event.listens_for(CompanyListingVersion.__table__, "after_create")
+def _seed_listing_version(target, connection, **kw):
+    connection.execute(text("INSERT INTO company_listing_version (id, version) VALUES (1, 1)"))
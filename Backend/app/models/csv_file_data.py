@@ -1,13 +1,17 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Computed
 from app.db.base import Base
+from app.utils.company_names import NORMALIZED_NAME_SQL
 
 class CSVFileData(Base):
     __tablename__ = "csv_file_data"
 
     id = Column(Integer, primary_key=True, index=True)
     company_name = Column(String(255), nullable=True)
+    company_name_normalized = Column(String(255), Computed(NORMALIZED_NAME_SQL, persisted=True), index=True)
     address1 = Column(String(255), nullable=True)
     address2 = Column(String(255), nullable=True)
     address3 = Column(String(255), nullable=True)
     city = Column(String(100), nullable=True)
     county = Column(String(100), nullable=True)
+    # SHA-256 of the normalized (company, address) pair, used to skip re-uploaded rows
+    row_hash = Column(String(64), nullable=True, index=True)
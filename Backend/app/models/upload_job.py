@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from app.db.base import Base
+from datetime import datetime
+
+class UploadJob(Base):
+    __tablename__ = "upload_jobs"
+
+    id = Column(String(36), primary_key=True)
+    filename = Column(String(255), nullable=True)
+    file_path = Column(String(512), nullable=False)
+    status = Column(String(20), default="Queued")
+    rows_processed = Column(Integer, default=0)
+    rows_succeeded = Column(Integer, default=0)
+    rows_failed = Column(Integer, default=0)
+    rows_deferred = Column(Integer, default=0)
+    rows_duplicate = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
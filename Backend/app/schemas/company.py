@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+# Response schemas for the hot read endpoints. Those endpoints build plain
+# dicts and return an ORJSONResponse directly, so these models document the
+# payload in OpenAPI (via `responses=`) without validating it per request.
+
+
+class CompanyListingItem(BaseModel):
+    # The full row; with ?fields= only the requested keys are present
+    id: int
+    company_name: str
+    registration_number: Optional[str] = None
+    company_status: str
+    approval_stage: Optional[int] = None
+    status: Optional[str] = None
+    type_of_scheme: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    # Latest year's figure as stored, normally a number
+    turnover_latest: Optional[Any] = None
+    assets_fair_value_latest: Optional[Any] = None
+    turnover_data: Optional[Dict[str, Any]] = None
+    fair_value_assets: Optional[Dict[str, Any]] = None
+    people_page_link: str
+    key_financial_data: Optional[Dict[str, Any]] = None
+    pdf_links: List[str] = []
+
+
+class ListingPagination(BaseModel):
+    total: int
+    page: int
+    per_page: int
+    total_pages: int
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
+
+
+class CompanyListingResponse(BaseModel):
+    data: List[CompanyListingItem]
+    pagination: ListingPagination
+
+
+class PersonItem(BaseModel):
+    id: int
+    name: str
+    role: Optional[str] = None
+    appointment_date: Optional[str] = None
+    date_of_birth: Optional[str] = None
+    company_registered_number: Optional[str] = None
+
+
+class CompanyPdfsResponse(BaseModel):
+    pdf_links: List[str]
+
+
+class CompanyStatusRequest(BaseModel):
+    ids: List[int]
+    # Only return companies modified at or after this time (the previous watermark)
+    since: Optional[datetime] = None
+
+
+class CompanyStatusItem(BaseModel):
+    id: int
+    status: Optional[str] = None
+    approval_stage: Optional[int] = None
+    last_modified: Optional[datetime] = None
+
+
+class CompanyStatusResponse(BaseModel):
+    companies: List[CompanyStatusItem]
+    # Pass back as `since` on the next poll
+    watermark: Optional[datetime] = None
@@ -0,0 +1,11 @@
+from typing import List, Literal
+from pydantic import BaseModel
+
+
+class MLOutcome(BaseModel):
+    registration_id: str
+    outcome: Literal["success", "failed"]
+
+
+class MLCallbackBatch(BaseModel):
+    results: List[MLOutcome]
@@ -0,0 +1,22 @@
+def clean_company_name(name):
+    """Display form of an uploaded company name ("Ltd"/"Ltd." spelled out as "Limited")."""
+    return name.replace("Ltd.", "Limited").replace("Ltd", "Limited").strip()
+
+
+def normalize_company_name(name):
+    """
+    Canonical key used to match company names across upload, import and delete.
+
+    Must stay in step with NORMALIZED_NAME_SQL, which computes the same key in
+    MySQL for the indexed company_name_normalized columns. Lowercases first,
+    since REPLACE is case sensitive, and TRIM only strips spaces, as here.
+    """
+    if not name:
+        return ""
+    return name.lower().replace("ltd.", "limited").replace("ltd", "limited").strip(" ")
+
+
+# Stored generated column expression mirroring normalize_company_name. Rows
+# written by other services (the ML pipeline inserts company_data directly)
+# get the key too, without any application code involved.
+NORMALIZED_NAME_SQL = "TRIM(REPLACE(REPLACE(LOWER(company_name), 'ltd.', 'limited'), 'ltd', 'limited'))"
@@ -0,0 +1,89 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import LISTING_COUNT_CACHE_TTL
+from app.models.company import CompanyData
+from app.models.company_listing import CompanyListing
+from app.models.key_financial_data import KeyFinancialData
+
+
+class CountCache:
+    """
+    Small TTL cache for listing totals, keyed by filter combination.
+
+    Entries are dropped whenever a session commits a change to company_data,
+    key_financial_data or the company_listing read model (see the listeners
+    below). Writes made by other processes, such as the ML service, are
+    picked up when the TTL expires.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            return value
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def set(self, key, value, generation):
+        """Stores value unless the cache was invalidated since `generation` was read."""
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+
+listing_counts = CountCache(LISTING_COUNT_CACHE_TTL)
+
+_WATCHED_CLASSES = (CompanyData, KeyFinancialData, CompanyListing)
+_WATCHED_TABLES = tuple(cls.__table__ for cls in _WATCHED_CLASSES)
+_DIRTY_KEY = "listing_counts_dirty"
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _WATCHED_CLASSES):
+            session.info[_DIRTY_KEY] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_statement(orm_execute_state):
+    # query().update()/delete() and bulk inserts bypass the flush
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    # Core statements on the table (the listing upsert) carry no mapper
+    table = getattr(orm_execute_state.statement, "table", None)
+    if (mapper is not None and mapper.class_ in _WATCHED_CLASSES) or table in _WATCHED_TABLES:
+        orm_execute_state.session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop(_DIRTY_KEY, False):
+        listing_counts.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session):
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,47 @@
+import codecs
+import csv
+import io
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def detect_encoding(f, encodings=("utf-8", "cp1252")):
+    """
+    Returns the first encoding in `encodings` that can decode the whole binary
+    stream. The stream is validated chunk by chunk with an incremental decoder,
+    so nothing beyond a single chunk is held in memory. The last encoding is
+    used as the fallback and is not validated (cp1252 accepts almost anything).
+    """
+    for encoding in encodings[:-1]:
+        f.seek(0)
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            while True:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    decoder.decode(b"", final=True)
+                    break
+                decoder.decode(chunk)
+        except UnicodeDecodeError:
+            continue
+        f.seek(0)
+        return encoding
+
+    f.seek(0)
+    return encodings[-1]
+
+
+def iter_csv_rows(f):
+    """
+    Yields csv.DictReader rows from a seekable binary file object without
+    reading it into memory. Decoding is done incrementally by TextIOWrapper
+    (newline="" as the csv module expects), after a first pass that picks
+    utf-8 or falls back to cp1252 like the old read-everything code did.
+    """
+    encoding = detect_encoding(f)
+    text = io.TextIOWrapper(f, encoding=encoding, newline="")
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        # Leave the underlying file open for the caller to close
+        text.detach()
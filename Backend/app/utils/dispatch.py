@@ -0,0 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_concurrently(items, func, max_workers):
+    """
+    Calls func(item) for every item on a bounded thread pool.
+
+    Returns a list of (item, result, error) tuples in the same order as items.
+    Exceptions raised by func are captured in `error` instead of aborting the
+    whole batch, so callers can keep their per-item success/failure handling.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def call(item):
+        try:
+            return item, func(item), None
+        except Exception as e:
+            return item, None, e
+
+    workers = max(1, min(max_workers, len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(call, items))
@@ -0,0 +1,41 @@
+import hashlib
+from fastapi import Request, Response
+
+# Clients must revalidate every time, but a matching ETag costs a 304 only
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts):
+    """
+    Weak ETag over a watermark, e.g. (last_modified, row count, query params).
+    The parts are hashed through repr(), so they need a stable repr.
+    """
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag):
+    """If-None-Match check using weak comparison (the W/ prefix is ignored)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def set_etag(response: Response, etag):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag):
+    """Empty 304 for a request whose If-None-Match already holds `etag`."""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -1,8 +1,9 @@
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from fastapi import HTTPException, Depends, status
+from fastapi import HTTPException, Depends, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from app.core.config import STATUS_EVENTS_TOKEN_TTL
 
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
@@ -15,6 +16,18 @@ def create_access_token(data: dict):
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+# Scope of the short-lived tokens that may appear in a URL (see create_stream_token)
+STATUS_EVENTS_SCOPE = "status-events"
+
+def create_stream_token(email: str):
+    """
+    Token for GET /company-status/events only. EventSource can only pass it in
+    the URL, where access logs and proxies keep it, so it expires after
+    STATUS_EVENTS_TOKEN_TTL seconds and is rejected everywhere else.
+    """
+    expire = datetime.utcnow() + timedelta(seconds=STATUS_EVENTS_TOKEN_TTL)
+    return jwt.encode({"sub": email, "scope": STATUS_EVENTS_SCOPE, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
     
 def decode_token(token: str):
     try:
@@ -23,12 +36,11 @@ def decode_token(token: str):
     except JWTError:
         raise ValueError("Invalid or expired token")
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """
-    Dependency to get current authenticated user from JWT token
-    """
+def _user_from_token(token: str, scope=None):
     try:
-        payload = decode_token(credentials.credentials)
+        payload = decode_token(token)
+        if payload.get("scope") != scope:
+            raise ValueError("Token is not valid for this endpoint")
         email = payload.get("sub")
         if not email:
             raise HTTPException(
@@ -42,4 +54,24 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e),
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    Dependency to get current authenticated user from JWT token
+    """
+    return _user_from_token(credentials.credentials)
+
+def get_current_user_from_query(token: str = Query(None)):
+    """
+    Like get_current_user, for clients that cannot set headers (the browser
+    EventSource API): reads a create_stream_token token from the `token`
+    query parameter. Regular access tokens are not accepted there.
+    """
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return _user_from_token(token, scope=STATUS_EVENTS_SCOPE)
\ No newline at end of file
@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+from sqlalchemy import and_, case, or_, text
+from app.core.config import LISTING_REBUILD_INTERVAL, STATUS_NORMALIZE_INTERVAL
+from app.crud.company_listing import rebuild_company_listing, refresh_company_listing
+from app.db.session import SessionLocal
+from app.models.company import CompanyData
+from app.models.key_financial_data import KeyFinancialData
+from app.utils.periodic import PeriodicTask
+
+
+@contextmanager
+def exclusive_lock(db, name):
+    """
+    MySQL named lock (GET_LOCK) held on its own connection for the duration of
+    the block, so only one API worker runs a given job at a time. Yields False
+    when another worker holds it. Other databases have a single process here.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "mysql":
+        yield True
+        return
+    with bind.connect() as conn:
+        acquired = conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": name}).scalar() == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
+
+def rebuild_listing():
+    db = SessionLocal()
+    try:
+        with exclusive_lock(db, "company_listing_rebuild") as acquired:
+            if not acquired:
+                return
+            written = rebuild_company_listing(db)
+            if written:
+                print(f"Listing rebuild rewrote {written} company_listing rows")
+    finally:
+        db.close()
+
+
+def normalize_company_status():
+    """
+    Fills in missing key_financial_data.company_status in one UPDATE: "Active"
+    when a registration number is present, "Inactive" otherwise. This is the
+    status the listing shows for such rows, so reads never have to write it.
+    """
+    missing_status = or_(KeyFinancialData.company_status.is_(None), KeyFinancialData.company_status == "")
+    registered = and_(
+        KeyFinancialData.company_registered_number.isnot(None),
+        KeyFinancialData.company_registered_number != "",
+    )
+
+    db = SessionLocal()
+    try:
+        company_ids = [
+            company_id
+            for (company_id,) in db.query(CompanyData.id)
+            .join(KeyFinancialData, CompanyData.key_financial_data_id == KeyFinancialData.id)
+            .filter(missing_status)
+            .all()
+        ]
+        updated = db.query(KeyFinancialData).filter(missing_status).update(
+            {KeyFinancialData.company_status: case((registered, "Active"), else_="Inactive")},
+            synchronize_session=False,
+        )
+        if not updated:
+            db.rollback()
+            return
+        refresh_company_listing(db, company_ids)
+        db.commit()
+        print(f"Normalized company_status for {updated} key financial data rows")
+    finally:
+        db.close()
+
+
+listing_rebuild_task = PeriodicTask(
+    "company-listing-rebuild", LISTING_REBUILD_INTERVAL, rebuild_listing, run_immediately=True
+)
+status_normalize_task = PeriodicTask(
+    "company-status-normalize", STATUS_NORMALIZE_INTERVAL, normalize_company_status, run_immediately=True
+)
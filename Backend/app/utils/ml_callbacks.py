@@ -0,0 +1,84 @@
+import threading
+from datetime import datetime
+from sqlalchemy import case
+from app.core.config import ML_CALLBACK_FLUSH_INTERVAL
+from app.crud.company_listing import refresh_company_listing
+from app.db.session import SessionLocal
+from app.models.company import CompanyData
+from app.models.key_financial_data import KeyFinancialData
+from app.utils.periodic import PeriodicTask
+from app.utils.status_events import publish_company_status
+
+# Company status written for each outcome the ML service reports
+OUTCOME_STATUS = {
+    "success": "Done",
+    "failed": "Not Started",
+}
+
+_pending_lock = threading.Lock()
+_pending = {}
+
+
+def record_outcomes(outcomes):
+    """
+    Buffers (registration_id, outcome) pairs until the next flush. A later
+    outcome for the same registration replaces an earlier one.
+    """
+    with _pending_lock:
+        for registration_id, outcome in outcomes:
+            _pending[registration_id] = outcome
+
+
+def pending_count():
+    with _pending_lock:
+        return len(_pending)
+
+
+def flush_outcomes():
+    """
+    Writes every buffered outcome with one UPDATE on company_data (status
+    from a CASE on id, plus last_modified), refreshes the listing rows and
+    publishes the status events. If the write fails, the outcomes go back into
+    the buffer for the next flush.
+    """
+    global _pending
+    with _pending_lock:
+        if not _pending:
+            return
+        outcomes, _pending = _pending, {}
+
+    db = SessionLocal()
+    try:
+        status_by_company = {
+            company_id: OUTCOME_STATUS[outcomes[registration_id]]
+            for company_id, registration_id in db.query(CompanyData.id, KeyFinancialData.company_registered_number)
+            .join(KeyFinancialData, CompanyData.key_financial_data_id == KeyFinancialData.id)
+            .filter(KeyFinancialData.company_registered_number.in_(outcomes.keys()))
+            .all()
+        }
+        if not status_by_company:
+            print(f"ML callback: no companies found for {len(outcomes)} registration numbers")
+            return
+
+        db.query(CompanyData).filter(CompanyData.id.in_(status_by_company.keys())).update(
+            {
+                CompanyData.status: case(status_by_company, value=CompanyData.id),
+                CompanyData.last_modified: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+        refresh_company_listing(db, status_by_company.keys())
+        db.commit()
+        print(f"ML callback: updated status for {len(status_by_company)} companies")
+        publish_company_status(db, status_by_company.keys())
+    except Exception as e:
+        db.rollback()
+        print(f"ML callback flush failed, keeping {len(outcomes)} outcomes for the next flush: {e}")
+        with _pending_lock:
+            # Anything reported since the swap is newer and wins
+            _pending = {**outcomes, **_pending}
+    finally:
+        db.close()
+
+
+ml_callback_flush_task = PeriodicTask("ml-callback-flush", ML_CALLBACK_FLUSH_INTERVAL, flush_outcomes)
@@ -0,0 +1,276 @@
+import random
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from app.core.config import (
+    PROCESS_COMPANY_API,
+    REPROCESS_COMPANY_API,
+    ML_CONNECT_TIMEOUT,
+    ML_READ_TIMEOUT,
+    ML_POOL_SIZE,
+    ML_MAX_RETRIES,
+    ML_BACKOFF_BASE,
+    ML_BACKOFF_MAX,
+    ML_BREAKER_THRESHOLD,
+    ML_BREAKER_RESET_SECONDS,
+    ML_RETRY_QUEUE_INTERVAL,
+    ML_RETRY_QUEUE_MAX,
+    ML_RETRY_QUEUE_MAX_ATTEMPTS,
+)
+from app.utils.periodic import PeriodicTask
+
+# Status codes that mean "try again later" rather than "this request is bad"
+TRANSIENT_STATUS_CODES = {429, 502, 503, 504}
+
+# One keep-alive connection pool shared by every call to the ML service.
+# requests.Session is safe to share between the upload worker threads here
+# because nothing mutates its state (cookies, headers) after creation.
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=2, pool_maxsize=ML_POOL_SIZE)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+_stats_lock = threading.Lock()
+_latency_stats = {}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the ML service while the breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls until
+    `reset_seconds` have passed. Then a single trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, threshold, reset_seconds):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    print(f"ML service circuit breaker opened after {self._failures} failures")
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+breaker = CircuitBreaker(ML_BREAKER_THRESHOLD, ML_BREAKER_RESET_SECONDS)
+
+
+def _backoff_delay(attempt):
+    # "Full jitter": a random delay up to the exponential cap for this attempt
+    return random.uniform(0, min(ML_BACKOFF_MAX, ML_BACKOFF_BASE * (2 ** attempt)))
+
+
+def post(url, payload):
+    """
+    POST `payload` as JSON to the ML service with the configured timeouts.
+
+    Connection errors, timeouts and 429/502/503/504 responses are retried up to
+    ML_MAX_RETRIES times with jittered exponential backoff. Every failed
+    attempt counts towards the circuit breaker; once it is open this raises
+    CircuitOpenError straight away instead of waiting on the service.
+    """
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"ML service circuit is open, not calling {url}")
+
+        started = time.perf_counter()
+        try:
+            response = _session.post(url, json=payload, timeout=(ML_CONNECT_TIMEOUT, ML_READ_TIMEOUT))
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            _record_latency(url, (time.perf_counter() - started) * 1000)
+            breaker.record_failure()
+            if attempt >= ML_MAX_RETRIES:
+                raise
+            print(f"ML call to {url} failed ({e}), retrying")
+        except Exception:
+            # Anything else (other RequestExceptions, a payload that cannot be
+            # encoded, ...) must still settle the attempt, or a half-open
+            # breaker would keep its trial flag and reject every call after it
+            _record_latency(url, (time.perf_counter() - started) * 1000)
+            breaker.record_failure()
+            raise
+        else:
+            _record_latency(url, (time.perf_counter() - started) * 1000)
+            if response.status_code < 500 and response.status_code != 429:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            if response.status_code not in TRANSIENT_STATUS_CODES or attempt >= ML_MAX_RETRIES:
+                return response
+            print(f"ML call to {url} returned {response.status_code}, retrying")
+
+        time.sleep(_backoff_delay(attempt))
+        attempt += 1
+
+
+def process_company(company_name, address):
+    return post(PROCESS_COMPANY_API, {"company": company_name, "address": address})
+
+
+def process_companies(companies):
+    """
+    Batch form of process_company: `companies` is a list of (name, address)
+    pairs sent as {"companies": [{"company", "address"}, ...]} in one request.
+    See batch_item_results for the expected response.
+    """
+    return post(PROCESS_COMPANY_API, {
+        "companies": [{"company": name, "address": address} for name, address in companies]
+    })
+
+
+def batch_item_results(response, count):
+    """
+    Per-item success flags for a batch request of `count` items.
+
+    The service answers {"results": [{"company": ..., "success": bool}, ...]}
+    in request order. A non-200 response, or a missing or malformed entry,
+    counts as a failure for the affected items.
+    """
+    if response.status_code != 200:
+        return [False] * count
+    try:
+        results = response.json().get("results") or []
+    except (ValueError, AttributeError):
+        return [False] * count
+
+    flags = []
+    for i in range(count):
+        item = results[i] if i < len(results) else None
+        flags.append(isinstance(item, dict) and bool(item.get("success")))
+    return flags
+
+
+def reprocess_company(registration_id):
+    return post(REPROCESS_COMPANY_API, {"registration_id": registration_id})
+
+
+def reprocess_companies(registration_ids):
+    return post(REPROCESS_COMPANY_API, {"registration_ids": registration_ids})
+
+
+# Calls that were rejected by the open breaker, kept for a later retry.
+# Each entry is [call, args, on_result, attempts].
+_deferred_lock = threading.Lock()
+_deferred = deque()
+
+
+def defer(call, *args, on_result=None):
+    """
+    Queues call(*args) to be retried by the background task once the breaker
+    lets calls through again. on_result(response) is called with the eventual
+    response, or with None if the call is dropped after too many attempts.
+    Returns False if the queue is full.
+    """
+    with _deferred_lock:
+        if len(_deferred) >= ML_RETRY_QUEUE_MAX:
+            return False
+        _deferred.append([call, args, on_result, 0])
+        return True
+
+
+def deferred_count():
+    with _deferred_lock:
+        return len(_deferred)
+
+
+def retry_deferred():
+    """Drains the deferred queue until it is empty or the breaker rejects a call."""
+    while True:
+        with _deferred_lock:
+            if not _deferred:
+                return
+            item = _deferred.popleft()
+
+        call, args, on_result, attempts = item
+        try:
+            response = call(*args)
+        except (CircuitOpenError, requests.exceptions.RequestException) as e:
+            item[3] = attempts + 1
+            if item[3] >= ML_RETRY_QUEUE_MAX_ATTEMPTS:
+                print(f"Giving up on deferred ML call after {item[3]} attempts: {e}")
+                _notify(on_result, None)
+                continue
+            with _deferred_lock:
+                _deferred.appendleft(item)
+            return
+        except Exception as e:
+            # Not a service outage (e.g. a payload that cannot be encoded):
+            # retrying will not help, so report the call as dropped
+            print(f"Giving up on deferred ML call: {e}")
+            _notify(on_result, None)
+            continue
+
+        _notify(on_result, response)
+
+
+def _notify(on_result, response):
+    if on_result is None:
+        return
+    try:
+        on_result(response)
+    except Exception as e:
+        print(f"Deferred ML result handler failed: {e}")
+
+
+deferred_retry_task = PeriodicTask("ml-deferred-retry", ML_RETRY_QUEUE_INTERVAL, retry_deferred)
+
+
+def _record_latency(url, elapsed_ms):
+    with _stats_lock:
+        stats = _latency_stats.setdefault(url, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0})
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["last_ms"] = elapsed_ms
+
+
+def get_latency_stats():
+    """Per-endpoint call count and latency (ms) since the process started."""
+    with _stats_lock:
+        return {
+            url: {
+                "calls": stats["calls"],
+                "avg_ms": round(stats["total_ms"] / stats["calls"], 1),
+                "max_ms": round(stats["max_ms"], 1),
+                "last_ms": round(stats["last_ms"], 1),
+            }
+            for url, stats in _latency_stats.items()
+        }
@@ -0,0 +1,28 @@
+import base64
+import json
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(company_name, company_id, direction):
+    """Opaque keyset cursor pointing just after (company_name, company_id)."""
+    payload = json.dumps([company_name, company_id, direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, direction):
+    """Returns (company_name, company_id); raises ValueError for a bad or mismatched cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        company_name, company_id, cursor_direction = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Malformed cursor")
+    if cursor_direction != direction or not isinstance(company_id, int):
+        raise ValueError("Cursor does not match the requested sort order")
+    return company_name, company_id
+
+
+def keyset_after(name_column, id_column, company_name, company_id, direction):
+    """Filter for rows after (company_name, company_id) in (name, id) order."""
+    if direction == "desc":
+        return or_(name_column < company_name, and_(name_column == company_name, id_column < company_id))
+    return or_(name_column > company_name, and_(name_column == company_name, id_column > company_id))
@@ -0,0 +1,56 @@
+import re
+from sqlalchemy import and_, case
+from sqlalchemy.dialects.mysql import match
+from app.core.config import SEARCH_NGRAM_TOKEN_SIZE
+
+# Characters with a meaning in MySQL boolean full-text queries
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+
+def search_terms(search):
+    """Whitespace separated terms of a search string, stripped of boolean operators."""
+    return [term for term in _BOOLEAN_OPERATORS.sub(" ", search).split() if term]
+
+
+def boolean_query(terms):
+    """
+    Boolean-mode AGAINST string requiring every term. With the ngram parser a
+    quoted term matches its n-grams in sequence, i.e. anywhere inside the name.
+    """
+    return " ".join(f'+"{term}"' for term in terms)
+
+
+def indexed_terms(db, search):
+    """
+    The terms of `search` the FULLTEXT index can look up: none unless on MySQL,
+    and only terms at least one n-gram long.
+    """
+    if db.get_bind().dialect.name != "mysql":
+        return []
+    return [term for term in search_terms(search) if len(term) >= SEARCH_NGRAM_TOKEN_SIZE]
+
+
+def name_search_filter(db, name_column, search):
+    """
+    Filter matching `search` anywhere in `name_column`. On MySQL the ngram
+    FULLTEXT index narrows the candidates first, so the LIKE only runs on rows
+    that already contain every indexable term.
+    """
+    substring = name_column.ilike(f"%{search.strip()}%")
+    terms = indexed_terms(db, search)
+    if not terms:
+        return substring
+    return and_(match(name_column, against=boolean_query(terms)).in_boolean_mode(), substring)
+
+
+def relevance_order(db, name_column, search):
+    """
+    ORDER BY clauses ranking search results: names starting with the search
+    text first, then by full-text score (on MySQL).
+    """
+    prefix = search.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    order = [case((name_column.ilike(f"{prefix}%", escape="\\"), 0), else_=1)]
+    terms = indexed_terms(db, search)
+    if terms:
+        order.append(match(name_column, against=boolean_query(terms)).in_boolean_mode().desc())
+    return order
@@ -0,0 +1,174 @@
+import asyncio
+import threading
+from datetime import timedelta
+from sqlalchemy import func
+from app.core.config import (
+    STATUS_EVENTS_QUEUE_SIZE,
+    STATUS_EVENTS_POLL_INTERVAL,
+    STATUS_EVENTS_POLL_LIMIT,
+    STATUS_EVENTS_POLL_OVERLAP,
+)
+from app.db.session import SessionLocal
+from app.models.company import CompanyData
+from app.utils.pagination import keyset_after
+from app.utils.periodic import PeriodicTask
+
+
+class StatusBroker:
+    """
+    In-process fan-out of company status events to the connected SSE clients.
+    Each subscriber is an asyncio queue on the event loop that serves it;
+    publish() can be called from any thread (request handlers, upload workers,
+    periodic tasks).
+    """
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            loop, queue = subscriber
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # The subscriber's event loop is gone
+                self.unsubscribe(subscriber)
+
+
+def _offer(queue, event):
+    # A client that falls behind loses its oldest events instead of holding up publishers
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+broker = StatusBroker(STATUS_EVENTS_QUEUE_SIZE)
+
+
+def _event(company_id, status, last_modified):
+    return {
+        "company_id": company_id,
+        "status": status,
+        "last_modified": last_modified.isoformat() if last_modified else None,
+    }
+
+
+# company_id -> (status, last_modified) of the last event sent for it, so the
+# poller does not repeat events that were published directly or on an
+# earlier poll. Entries older than the poll window are dropped.
+_sent_lock = threading.Lock()
+_sent = {}
+
+
+def _publish_new(rows):
+    with _sent_lock:
+        new_rows = [row for row in rows if _sent.get(row.id) != (row.status, row.last_modified)]
+        for row in new_rows:
+            _sent[row.id] = (row.status, row.last_modified)
+    for row in new_rows:
+        broker.publish(_event(row.id, row.status, row.last_modified))
+
+
+def publish_company_status(db, company_ids):
+    """
+    Publishes the current {company_id, status, last_modified} of `company_ids`.
+    Call it after the commit that changed them; it is a no-op while nobody is
+    listening.
+    """
+    if not company_ids or not broker.has_subscribers():
+        return
+    rows = (
+        db.query(CompanyData.id, CompanyData.status, CompanyData.last_modified)
+        .filter(CompanyData.id.in_(set(company_ids)))
+        .all()
+    )
+    _publish_new(rows)
+
+
+# Newest last_modified the poller has seen; None until a client is connected
+_poll_position = {"last_modified": None}
+
+
+def poll_status_changes():
+    """
+    Publishes company_data rows changed since the last poll. This covers
+    status changes made outside this process, such as the ML service
+    finishing a company or another API worker handling a request. Changes
+    that do not touch last_modified are not seen.
+
+    last_modified is stamped by the writer before it commits, so a row can
+    become visible with a timestamp older than ones already seen. Each poll
+    therefore re-reads the last STATUS_EVENTS_POLL_OVERLAP seconds and skips
+    rows whose (status, last_modified) was already sent.
+    """
+    if not broker.has_subscribers():
+        # Start from "now" again when the next client connects
+        _poll_position["last_modified"] = None
+        with _sent_lock:
+            _sent.clear()
+        return
+
+    db = SessionLocal()
+    try:
+        starting = _poll_position["last_modified"] is None
+        if starting:
+            newest = db.query(func.max(CompanyData.last_modified)).scalar()
+            if newest is None:
+                return
+            _poll_position["last_modified"] = newest
+
+        window_start = _poll_position["last_modified"] - timedelta(seconds=STATUS_EVENTS_POLL_OVERLAP)
+        after = (window_start, 0)
+        while True:
+            rows = (
+                db.query(CompanyData.id, CompanyData.status, CompanyData.last_modified)
+                .filter(keyset_after(CompanyData.last_modified, CompanyData.id, after[0], after[1], "asc"))
+                .order_by(CompanyData.last_modified.asc(), CompanyData.id.asc())
+                .limit(STATUS_EVENTS_POLL_LIMIT)
+                .all()
+            )
+            if starting:
+                # Only changes from here on are news to the new clients
+                with _sent_lock:
+                    _sent.update((row.id, (row.status, row.last_modified)) for row in rows)
+            else:
+                _publish_new(rows)
+            if rows:
+                after = (rows[-1].last_modified, rows[-1].id)
+                _poll_position["last_modified"] = max(_poll_position["last_modified"], rows[-1].last_modified)
+            if len(rows) < STATUS_EVENTS_POLL_LIMIT:
+                break
+
+        # Nothing older than the next window can be re-read, so forget it
+        window_start = _poll_position["last_modified"] - timedelta(seconds=STATUS_EVENTS_POLL_OVERLAP)
+        with _sent_lock:
+            expired = [
+                company_id
+                for company_id, (_, modified) in _sent.items()
+                if modified is None or modified < window_start
+            ]
+            for company_id in expired:
+                del _sent[company_id]
+    finally:
+        db.close()
+
+
+status_poll_task = PeriodicTask("company-status-poll", STATUS_EVENTS_POLL_INTERVAL, poll_status_changes)
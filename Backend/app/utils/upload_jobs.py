@@ -0,0 +1,393 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.core.config import (
+    PROCESS_COMPANY_CONCURRENCY,
+    PROCESS_COMPANY_BATCH_SIZE,
+    UPLOAD_JOB_WORKERS,
+    CSV_CHUNK_SIZE,
+)
+from app.db.session import SessionLocal
+from app.models.company import CompanyData
+from app.models.csv_file_data import CSVFileData
+from app.models.upload_job import UploadJob
+from app.crud.company_listing import refresh_company_listing
+from app.utils.status_events import publish_company_status
+from app.utils.company_names import clean_company_name, normalize_company_name
+from app.utils.csv_stream import iter_csv_rows
+from app.utils.dispatch import run_concurrently
+from app.utils import ml_client
+from app.utils.maintenance import exclusive_lock
+
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_JOB_WORKERS, thread_name_prefix="upload-job")
+
+
+def submit_upload_job(job_id):
+    """Queue a persisted upload for processing outside the request thread."""
+    _executor.submit(process_upload_job, job_id)
+
+
+def recover_upload_jobs():
+    """
+    Startup pass over upload_jobs, since the executor does not survive a
+    restart: unfinished jobs whose file is still on disk are submitted again,
+    the others are marked Failed, and files left behind by finished jobs are
+    removed. A job another worker is still running is skipped by
+    process_upload_job, which holds a per-job lock while it runs.
+    """
+    db = SessionLocal()
+    try:
+        resubmit = []
+        for job in db.query(UploadJob).all():
+            has_file = bool(job.file_path) and os.path.exists(job.file_path)
+            if job.status in ("Queued", "Running"):
+                if has_file:
+                    resubmit.append(job.id)
+                else:
+                    job.status = "Failed"
+                    job.error = "Upload file was lost before the job finished"
+                    job.finished_at = datetime.utcnow()
+            elif has_file:
+                _remove_upload_file(job.id, job.file_path)
+        db.commit()
+    finally:
+        db.close()
+
+    for job_id in resubmit:
+        submit_upload_job(job_id)
+    if resubmit:
+        print(f"Resubmitted {len(resubmit)} unfinished upload jobs")
+
+
+def _remove_upload_file(job_id, file_path):
+    try:
+        os.remove(file_path)
+    except OSError as e:
+        print(f"Could not remove upload file for job {job_id}: {e}")
+
+
+def process_upload_job(job_id):
+    db = SessionLocal()
+    try:
+        with exclusive_lock(db, f"upload_job:{job_id}") as acquired:
+            if not acquired:
+                # Already running in another worker
+                return
+            _run_upload_job(db, job_id)
+    finally:
+        db.close()
+
+
+def _run_upload_job(db, job_id):
+    file_path = None
+    try:
+        job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
+        if not job:
+            print(f"Upload job {job_id} not found")
+            return
+        if job.status not in ("Queued", "Running"):
+            return
+
+        file_path = job.file_path
+        if job.status == "Running":
+            # Interrupted by a restart: start over. Rows the ML service already
+            # accepted are recorded, so they come back as duplicates
+            job.rows_processed = job.rows_succeeded = job.rows_failed = 0
+            job.rows_deferred = job.rows_duplicate = 0
+        job.status = "Running"
+        job.started_at = datetime.utcnow()
+        db.commit()
+
+        try:
+            # Rows are streamed from disk and handled one chunk at a time,
+            # so memory use does not grow with the size of the upload.
+            # Accepted rows are found again through the row_hash lookup; only
+            # deferred rows (not recorded yet) are remembered here, and those
+            # are bounded by the size of the retry queue.
+            deferred_hashes = set()
+            with open(file_path, "rb") as f:
+                chunk = []
+                for row in iter_csv_rows(f):
+                    chunk.append(row)
+                    if len(chunk) >= CSV_CHUNK_SIZE:
+                        _process_chunk(db, job, chunk, deferred_hashes)
+                        chunk = []
+                if chunk:
+                    _process_chunk(db, job, chunk, deferred_hashes)
+
+            job.status = "Completed"
+        except Exception as e:
+            db.rollback()
+            print(f"Upload job {job_id} failed: {e}")
+            job.status = "Failed"
+            job.error = str(e)
+
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    finally:
+        # The persisted upload is only needed until the job has run
+        if file_path and os.path.exists(file_path):
+            _remove_upload_file(job_id, file_path)
+
+
+def _process_chunk(db, job, rows, deferred_hashes):
+    """
+    Handles one chunk of CSV rows with a fixed number of database round trips:
+    one IN query to drop rows already recorded, one IN query to match company
+    names, one UPDATE to mark them Processing, and one bulk insert of
+    CSVFileData rows for the successful ML calls.
+
+    Repeats of a row within the chunk are sent once and share its outcome.
+    A row is only treated as seen once it was accepted (recorded in
+    csv_file_data) or deferred, so a failed row is sent again when it shows
+    up in a later chunk.
+    """
+    pending_rows = []
+    duplicates = 0
+    chunk_hashes = {}
+    # Extra copies of each pending row within this chunk
+    copies = {}
+    for row in rows:
+        company_name = row.get("Company")
+        if not company_name:
+            continue
+
+        company_name = clean_company_name(company_name)
+        full_address = _full_address(row)
+
+        row_hash = content_hash(company_name, full_address)
+        if row_hash in deferred_hashes:
+            duplicates += 1
+            continue
+        if row_hash in chunk_hashes:
+            copies[row_hash] = copies.get(row_hash, 0) + 1
+            continue
+
+        chunk_hashes[row_hash] = len(pending_rows)
+        pending_rows.append((company_name, full_address, row))
+
+    # 🔹 0. Skip rows that this or an earlier upload already sent to the ML service
+    if chunk_hashes:
+        recorded = {
+            row_hash
+            for (row_hash,) in db.query(CSVFileData.row_hash)
+            .filter(CSVFileData.row_hash.in_(chunk_hashes.keys()))
+            .all()
+        }
+        if recorded:
+            skip = {chunk_hashes[row_hash] for row_hash in recorded}
+            pending_rows = [item for i, item in enumerate(pending_rows) if i not in skip]
+            duplicates += sum(1 + copies.pop(row_hash, 0) for row_hash in recorded)
+
+    # 🔹 1. Resolve the whole chunk against company_data in one (indexed) query
+    names = {normalize_company_name(company_name) for company_name, _, _ in pending_rows}
+    existing_ids = []
+    if names:
+        existing_ids = [
+            company_id
+            for (company_id,) in db.query(CompanyData.id)
+            .filter(CompanyData.company_name_normalized.in_(names))
+            .all()
+        ]
+
+    # 🔹 2. Set every matched company to "Processing" in one UPDATE
+    if existing_ids:
+        db.query(CompanyData).filter(CompanyData.id.in_(existing_ids)).update(
+            {CompanyData.status: "Processing", CompanyData.last_modified: datetime.utcnow()},
+            synchronize_session=False,
+        )
+        refresh_company_listing(db, existing_ids)
+        db.commit()
+        publish_company_status(db, existing_ids)
+        print(f"Updated {len(existing_ids)} companies to Processing")
+
+    # 🔹 3. Fan the ML calls out over a bounded pool, then record results here
+    # (the db session is not thread-safe, so only the HTTP calls run concurrently)
+    if PROCESS_COMPANY_BATCH_SIZE > 1:
+        outcomes = _dispatch_batches(pending_rows)
+    else:
+        outcomes = _dispatch_rows(pending_rows)
+
+    csv_records = []
+    failed = 0
+    deferred = 0
+    for company_name, row, outcome in outcomes:
+        row_hash = content_hash(company_name, _full_address(row))
+        repeats = copies.get(row_hash, 0)
+        if outcome == "failed":
+            # The copies were not sent either, so they failed with it
+            failed += 1 + repeats
+            continue
+        duplicates += repeats
+        if outcome == "ok":
+            csv_records.append(_csv_record(company_name, row))
+        else:
+            deferred += 1
+            deferred_hashes.add(row_hash)
+
+    # 🔹 4. One bulk insert and one commit (together with the job progress) per chunk
+    if csv_records:
+        db.bulk_insert_mappings(CSVFileData, csv_records)
+
+    job.rows_processed = (job.rows_processed or 0) + len(csv_records) + failed + deferred + duplicates
+    job.rows_duplicate = (job.rows_duplicate or 0) + duplicates
+    job.rows_succeeded = (job.rows_succeeded or 0) + len(csv_records)
+    job.rows_failed = (job.rows_failed or 0) + failed
+    job.rows_deferred = (job.rows_deferred or 0) + deferred
+    db.commit()
+
+
+def _dispatch_rows(pending_rows):
+    """One PROCESS_COMPANY_API request per row. Returns (company_name, row, outcome) tuples."""
+    def call_process_api(item):
+        company_name, full_address, _ = item
+        return ml_client.process_company(company_name, full_address)
+
+    results = run_concurrently(pending_rows, call_process_api, PROCESS_COMPANY_CONCURRENCY)
+
+    outcomes = []
+    for (company_name, full_address, row), api_response, error in results:
+        if isinstance(error, ml_client.CircuitOpenError):
+            # The ML service is known to be down: queue the row for a later retry
+            # instead of dropping it
+            csv_records = [_csv_record(company_name, row)]
+            if ml_client.defer(
+                ml_client.process_company, company_name, full_address,
+                on_result=_record_deferred_rows(csv_records, batch=False),
+            ):
+                outcomes.append((company_name, row, "deferred"))
+            else:
+                print(f"Retry queue full, dropping {company_name}")
+                outcomes.append((company_name, row, "failed"))
+            continue
+
+        if error is not None:
+            print(f"Error fetching API data for {company_name}: {error}")
+            outcomes.append((company_name, row, "failed"))
+            continue
+
+        try:
+            print(api_response.status_code, api_response.json())
+        except ValueError as e:
+            print(f"Error fetching API data for {company_name}: {e}")
+            outcomes.append((company_name, row, "failed"))
+            continue
+
+        if api_response.status_code == 200:
+            outcomes.append((company_name, row, "ok"))
+        else:
+            print(f"API failed for {company_name}: {api_response.status_code}")
+            outcomes.append((company_name, row, "failed"))
+
+    return outcomes
+
+
+def _dispatch_batches(pending_rows):
+    """
+    Groups rows into PROCESS_COMPANY_BATCH_SIZE batches and sends each batch in
+    a single PROCESS_COMPANY_API request. Returns (company_name, row, outcome)
+    tuples, using the per-item results in each batch response.
+    """
+    batches = [
+        pending_rows[i:i + PROCESS_COMPANY_BATCH_SIZE]
+        for i in range(0, len(pending_rows), PROCESS_COMPANY_BATCH_SIZE)
+    ]
+
+    def call_process_api(batch):
+        return ml_client.process_companies([(company_name, full_address) for company_name, full_address, _ in batch])
+
+    results = run_concurrently(batches, call_process_api, PROCESS_COMPANY_CONCURRENCY)
+
+    outcomes = []
+    for batch, api_response, error in results:
+        if isinstance(error, ml_client.CircuitOpenError):
+            csv_records = [_csv_record(company_name, row) for company_name, _, row in batch]
+            queued = ml_client.defer(
+                ml_client.process_companies,
+                [(company_name, full_address) for company_name, full_address, _ in batch],
+                on_result=_record_deferred_rows(csv_records, batch=True),
+            )
+            if not queued:
+                print(f"Retry queue full, dropping batch of {len(batch)} companies")
+            outcomes.extend((company_name, row, "deferred" if queued else "failed") for company_name, _, row in batch)
+            continue
+
+        if error is not None:
+            print(f"Error fetching API data for batch of {len(batch)} companies: {error}")
+            outcomes.extend((company_name, row, "failed") for company_name, _, row in batch)
+            continue
+
+        item_ok = ml_client.batch_item_results(api_response, len(batch))
+        if api_response.status_code != 200:
+            print(f"API failed for batch of {len(batch)} companies: {api_response.status_code}")
+        for (company_name, _, row), ok in zip(batch, item_ok):
+            if not ok:
+                print(f"API failed for {company_name}")
+            outcomes.append((company_name, row, "ok" if ok else "failed"))
+
+    return outcomes
+
+
+def _full_address(row):
+    address_parts = [
+        row.get("Address1"),
+        row.get("Address2"),
+        row.get("Address3"),
+        row.get("City"),
+        row.get("County"),
+    ]
+    return ", ".join([part for part in address_parts if part])
+
+
+def content_hash(company_name, full_address):
+    """
+    SHA-256 of the normalized (company, address) pair, stored on CSVFileData
+    to recognise rows that were already sent for processing. The name uses
+    normalize_company_name; case and runs of whitespace are ignored throughout.
+    """
+    normalized = " ".join(normalize_company_name(company_name).split()) + "|" + " ".join(full_address.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _csv_record(company_name, row):
+    return {
+        "row_hash": content_hash(company_name, _full_address(row)),
+        "company_name": company_name,
+        "address1": row.get("Address1"),
+        "address2": row.get("Address2"),
+        "address3": row.get("Address3"),
+        "city": row.get("City"),
+        "county": row.get("County"),
+    }
+
+
+def _record_deferred_rows(csv_records, batch):
+    """
+    Result handler for a deferred process call: store the rows the ML service
+    accepted once the call finally goes through. `batch` says whether the call
+    was process_companies (per-item results) or process_company.
+    """
+    def on_result(api_response):
+        if api_response is None:
+            print(f"Deferred API call dropped for {len(csv_records)} companies")
+            return
+
+        if batch:
+            item_ok = ml_client.batch_item_results(api_response, len(csv_records))
+        else:
+            item_ok = [api_response.status_code == 200]
+        accepted = [record for record, ok in zip(csv_records, item_ok) if ok]
+        if len(accepted) < len(csv_records):
+            print(f"Deferred API call failed for {len(csv_records) - len(accepted)} companies")
+        if not accepted:
+            return
+
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(CSVFileData, accepted)
+            db.commit()
+        finally:
+            db.close()
+
+    return on_result
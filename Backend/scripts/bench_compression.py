@@ -0,0 +1,81 @@
+"""
+Payload size and latency of /company-data pages through CompressionMiddleware,
+for identity, gzip and (if installed) brotli at a few levels.
+
+    python -m scripts.bench_compression [mbit_per_s]
+
+Run from Backend/. Pages are the synthetic listing rows from
+bench_serialization, encoded with orjson as the endpoint does. "total" is the
+time spent compressing plus the transfer time at the given bandwidth
+(default 20 Mbit/s, roughly the office VPN).
+"""
+import asyncio
+import sys
+import time
+from fastapi.responses import ORJSONResponse
+from app.utils import compression
+from app.utils.compression import CompressionMiddleware
+from scripts.bench_serialization import listing_row
+
+PAGE_SIZES = (100, 1000)
+ITERATIONS = 10
+
+
+def page_app(body):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+async def fetch(app, accept_encoding):
+    scope = {"type": "http", "method": "GET", "path": "/api/company-data", "headers": [(b"accept-encoding", accept_encoding.encode("ascii"))]}
+    chunks = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(chunks)
+
+
+def measure(app, accept_encoding):
+    timings = []
+    for _ in range(ITERATIONS):
+        started = time.perf_counter()
+        body = asyncio.run(fetch(app, accept_encoding))
+        timings.append(time.perf_counter() - started)
+    return len(body), sorted(timings)[len(timings) // 2]
+
+
+def main():
+    mbit = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    bytes_per_second = mbit * 1_000_000 / 8
+
+    variants = [("identity", "identity", {})]
+    variants += [(f"gzip -{level}", "gzip", {"gzip_level": level}) for level in (1, 6, 9)]
+    if compression.brotli is not None:
+        variants += [(f"br q{quality}", "br", {"brotli_quality": quality}) for quality in (1, 4, 11)]
+    else:
+        print("brotli not installed, gzip only")
+
+    for rows in PAGE_SIZES:
+        body = ORJSONResponse({"data": [listing_row(i) for i in range(rows)], "pagination": {}}).body
+        print(f"\n{rows}-row page, {len(body) / 1024:.0f} KiB raw, {mbit:g} Mbit/s")
+        print(f"  {'encoding':<10} {'KiB':>8} {'ratio':>7} {'encode ms':>10} {'total ms':>9}")
+        for name, accept_encoding, options in variants:
+            app = CompressionMiddleware(page_app(body), minimum_size=1024, **options)
+            size, seconds = measure(app, accept_encoding)
+            total = seconds + size / bytes_per_second
+            print(f"  {name:<10} {size / 1024:8.1f} {len(body) / size:6.1f}x {seconds * 1000:10.2f} {total * 1000:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
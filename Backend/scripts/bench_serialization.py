@@ -0,0 +1,76 @@
+"""
+Serialization cost of a 1,000-row GET /company-data page: FastAPI's default
+path (jsonable_encoder, then JSONResponse/json.dumps) against the
+ORJSONResponse the endpoint now returns directly.
+
+    python scripts/bench_serialization.py [rows] [iterations]
+
+Only encoding is timed; the rows are synthetic but shaped like listing rows.
+"""
+import sys
+import timeit
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+SCHEME_FIELDS = [
+    f"{prefix}_{n}"
+    for n in (1, 2, 3)
+    for prefix in ("Name_of_Defined_Benefit_Arrangement", "Status_of_Defined_Benefit_Arrangement", "scheme_actuary", "scheme_actuary_firm")
+]
+
+
+def listing_row(i):
+    years = {str(year): 1000.0 * i + year for year in range(2015, 2025)}
+    return {
+        "id": i,
+        "company_name": f"Company {i} Limited",
+        "registration_number": f"{i:08d}",
+        "company_status": "Active",
+        "approval_stage": i % 3,
+        "status": "Done",
+        "type_of_scheme": "Defined Benefit",
+        "last_modified": datetime(2025, 1, 1) + timedelta(minutes=i),
+        "turnover_latest": years["2024"],
+        "assets_fair_value_latest": years["2024"] / 2,
+        "turnover_data": years,
+        "fair_value_assets": {year: value / 2 for year, value in years.items()},
+        "people_page_link": f"/people/{i}",
+        "key_financial_data": {
+            "company_status": "Active",
+            "company_registered_number": f"{i:08d}",
+            "incorporation_date": "2001-04-01",
+            "latest_accounts_date": "2024-03-31",
+            **{field: f"{field} {i}" for field in SCHEME_FIELDS},
+        },
+        "pdf_links": [f"https://example.com/{i}/accounts-{year}.pdf" for year in (2022, 2023, 2024)],
+    }
+
+
+def default_path(content):
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def orjson_path(content):
+    return ORJSONResponse(content).body
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    content = {
+        "data": [listing_row(i) for i in range(rows)],
+        "pagination": {"total": rows, "page": 1, "per_page": rows, "total_pages": 1, "next_cursor": None, "total_is_estimate": False},
+    }
+
+    print(f"{rows} rows, {len(orjson_path(content)) / 1024:.0f} KiB per page, best of 5 x {iterations}")
+    results = {}
+    for name, func in (("jsonable_encoder + json", default_path), ("orjson", orjson_path)):
+        best = min(timeit.repeat(lambda: func(content), number=iterations, repeat=5)) / iterations
+        results[name] = best
+        print(f"  {name:<24} {best * 1000:8.2f} ms")
+    print(f"  speedup                  {results['jsonable_encoder + json'] / results['orjson']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
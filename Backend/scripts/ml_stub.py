@@ -0,0 +1,95 @@
+"""
+Local stand-in for the ML processing service, for exercising uploads and
+reprocessing without the real extraction pipeline.
+
+    uvicorn scripts.ml_stub:app --port 9000
+
+then point the backend at it:
+
+    PROCESS_COMPANY_API=http://localhost:9000/process-company
+    REPROCESS_COMPANY_API=http://localhost:9000/reprocess-company
+
+STUB_LATENCY_MS adds a per-request delay and STUB_FAILURE_RATE (0-1) makes
+that share of requests (or batch items) fail, to try out retries and the
+circuit breaker.
+
+With STUB_CALLBACK_URL set (e.g. http://localhost:8000/api/ml-service/callback)
+the stub reports each accepted reprocess back after STUB_CALLBACK_DELAY_MS,
+sending STUB_CALLBACK_SECRET (the backend's ML_CALLBACK_SECRET). Each company
+fails with STUB_FAILURE_RATE.
+"""
+import asyncio
+import os
+import random
+import requests
+from fastapi import FastAPI, Body
+from fastapi.responses import JSONResponse
+
+LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "50"))
+FAILURE_RATE = float(os.getenv("STUB_FAILURE_RATE", "0"))
+CALLBACK_URL = os.getenv("STUB_CALLBACK_URL")
+CALLBACK_SECRET = os.getenv("STUB_CALLBACK_SECRET", "")
+CALLBACK_DELAY_MS = float(os.getenv("STUB_CALLBACK_DELAY_MS", "2000"))
+
+app = FastAPI()
+stats = {"requests": 0, "companies": 0}
+
+
+def _fails():
+    return random.random() < FAILURE_RATE
+
+
+@app.post("/process-company")
+async def process_company(payload: dict = Body(...)):
+    stats["requests"] += 1
+    await asyncio.sleep(LATENCY_MS / 1000)
+
+    # Batch mode: {"companies": [{"company", "address"}, ...]}
+    if "companies" in payload:
+        companies = payload["companies"] or []
+        stats["companies"] += len(companies)
+        return {
+            "results": [
+                {"company": item.get("company"), "success": not _fails()}
+                for item in companies
+            ]
+        }
+
+    stats["companies"] += 1
+    if _fails():
+        return JSONResponse(status_code=503, content={"detail": "stub failure"})
+    return {"company": payload.get("company"), "success": True}
+
+
+@app.post("/reprocess-company")
+async def reprocess_company(payload: dict = Body(...)):
+    stats["requests"] += 1
+    await asyncio.sleep(LATENCY_MS / 1000)
+    ids = payload.get("registration_ids") or [payload.get("registration_id")]
+    stats["companies"] += len(ids)
+    if _fails():
+        return JSONResponse(status_code=503, content={"detail": "stub failure"})
+    if CALLBACK_URL:
+        asyncio.create_task(_report_back(ids))
+    return {"registration_ids": ids, "success": True}
+
+
+async def _report_back(registration_ids):
+    await asyncio.sleep(CALLBACK_DELAY_MS / 1000)
+    results = [
+        {"registration_id": registration_id, "outcome": "failed" if _fails() else "success"}
+        for registration_id in registration_ids
+    ]
+    try:
+        response = await asyncio.to_thread(
+            requests.post, CALLBACK_URL, json={"results": results},
+            headers={"X-ML-Callback-Secret": CALLBACK_SECRET}, timeout=10,
+        )
+        print(f"Callback for {len(results)} companies: {response.status_code}")
+    except requests.exceptions.RequestException as e:
+        print(f"Callback failed: {e}")
+
+
+@app.get("/stats")
+def get_stats():
+    return stats